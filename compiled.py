@@ -0,0 +1,547 @@
+"""
+Compiled dictionary: the parsed vocab with every paradigm already inflected, written as one
+file of fixed-width records and a string table that is read through `mmap`
+
+Opening a compiled dictionary only reads its header; vocab are `CompiledView`s that read their
+record when an attribute is accessed. Processes opening the same file (eg. the visualizer and
+every bot shard) share its pages through the page cache instead of each holding their own copy
+of the vocab
+
+Layout (little endian), sections located by `(offset, count)` pairs in the file header:
+
+    strings          `count + 1` u32 offsets into the UTF-8 blob that directly follows them
+    headers          `header_struct` records: name, first vocab and vocab count
+    vocab            `vocab_struct` records, see `write_compiled_vocab`
+    blocks           `block_struct` records: description block text and `DescBlockType`
+    forms            u32 string ids of the conjugated/declined forms
+    special cases    `special_case_struct` records: `Verb.special_cases` key and form
+
+Strings are referred to by id; `NO_STRING` stands for `None`. The file header also holds the key
+of the sources it was compiled from and their `(size, mtime)`, see `loader.get_compiled_vocab`
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterator, NamedTuple
+
+import vocab
+
+
+MAGIC = b"LVOC"
+
+COMPILED_VOCAB_VERSION = 2
+"""
+Bump whenever the layout below changes
+"""
+
+NO_STRING = 0xFFFFFFFF
+
+# Number of forms of a mood that isn't a paradigm, see `vocab_struct`
+NO_FORMS = 0xFFFF
+SINGLE_FORM = 0xFFFE
+
+# `(size, mtime in ns)` of each source file
+SOURCE_STAT_COUNT = 8
+
+file_header_struct = struct.Struct(f"<4sI64s{SOURCE_STAT_COUNT}q12I")
+source_stats_offset = struct.calcsize("<4sI64s")
+header_struct = struct.Struct("<III")
+vocab_struct = struct.Struct("<BbbBIHHIII4II4H")
+block_struct = struct.Struct("<IB")
+form_struct = struct.Struct("<I")
+special_case_struct = struct.Struct("<II")
+
+FLAG_LOADED = 1
+FLAG_PLURAL_ONLY = 2
+
+
+class VocabRecord(NamedTuple):
+    """
+    A `vocab_struct` record
+    """
+    type: int
+    inflection_class: int
+    gender: int
+    flags: int
+    first_block: int
+    block_count: int
+    part_count: int
+    first_form: int
+    first_special_case: int
+    special_case_count: int
+    # Principal parts, or nom. sg., gen. sg. and base, or masc., fem. and neut.
+    field0: int
+    field1: int
+    field2: int
+    field3: int
+    english: int
+    # Form count of each mood (the cases use the first), `NO_FORMS` or `SINGLE_FORM`
+    forms0: int
+    forms1: int
+    forms2: int
+    forms3: int
+
+    @property
+    def fields(self) -> tuple[int, ...]:
+        return self[10:14]
+
+    @property
+    def form_counts(self) -> tuple[int, ...]:
+        return self[15:19]
+
+
+vocab_types: tuple[type[vocab.Vocab], ...] = (
+    vocab.Vocab, vocab.Verb, vocab.Adverb, vocab.Noun, vocab.Adjective, vocab.Pronoun,
+    vocab.Preoposition, vocab.Conjunction, vocab.Interjection, vocab.Unknown,
+)
+block_types: tuple[vocab.DescBlockType, ...] = tuple(vocab.DescBlockType)
+
+
+def write_compiled_vocab(path: str, key: str, source_stats: tuple[int, ...], parsed_vocab: dict[str,list[vocab.Vocab]]):
+    """
+    Compiles `parsed_vocab` (eg. from `loader.get_parsed_vocab`) to `path`, inflecting every
+    verb and noun. `key` identifies the sources it was compiled from and `source_stats` are their
+    `SOURCE_STAT_COUNT` stat values (see `loader.get_compiled_vocab`)
+
+    The file is replaced atomically, so processes that have the old one open keep reading it
+    """
+    strings: dict[str, int] = {}
+    headers = bytearray()
+    records = bytearray()
+    blocks = bytearray()
+    forms = bytearray()
+    special_cases = bytearray()
+    counts = [0] * 5
+
+    def string_id(text: str|None) -> int:
+        if text is None:
+            return NO_STRING
+        if (string := strings.get(text)) is None:
+            string = strings[text] = len(strings)
+        return string
+
+    def add_forms(mood_forms: vocab.Paradigm|list[str]|str|None) -> int:
+        if mood_forms is None:
+            return NO_FORMS
+        if isinstance(mood_forms, str):
+            mood_forms = [mood_forms]
+            count = SINGLE_FORM
+        else:
+            count = len(mood_forms)
+        for form in mood_forms:
+            forms.extend(form_struct.pack(string_id(form)))
+            counts[3] += 1
+        return count
+
+    for header_name, vocab_list in parsed_vocab.items():
+        headers.extend(header_struct.pack(string_id(header_name), counts[1], len(vocab_list)))
+        counts[0] += 1
+
+        for vocab_word in vocab_list:
+            first_block = counts[2]
+            for text, block_type in vocab_word.parsed_description:
+                blocks.extend(block_struct.pack(string_id(text), block_types.index(block_type)))
+                counts[2] += 1
+
+            first_form = counts[3]
+            first_special_case = counts[4]
+            inflection_class = gender = -1
+            flags = FLAG_LOADED if vocab_word.loaded else 0
+            fields: list[str|None] = [None] * 4
+            part_count = 0
+            form_counts = [NO_FORMS] * len(vocab.Mood)
+
+            match vocab_word:
+                case vocab.Verb():
+                    inflection_class = vocab_word.conjugation
+                    part_count = len(vocab_word.principal_parts)
+                    fields[:part_count] = vocab_word.principal_parts
+                    form_counts = [add_forms(vocab_word.conjugations[mood]) for mood in vocab.Mood]
+                    for special_key, form in vocab_word.special_cases.items():
+                        special_cases.extend(special_case_struct.pack(special_key, string_id(form)))
+                        counts[4] += 1
+
+                case vocab.Noun():
+                    inflection_class = vocab_word.declension
+                    gender = vocab_word.gender
+                    flags |= FLAG_PLURAL_ONLY if vocab_word.plural_only else 0
+                    fields[:3] = (vocab_word.nom_sg, vocab_word.gen_sg, vocab_word.base,)
+                    form_counts[0] = add_forms(vocab_word.cases)
+
+                case vocab.Adjective():
+                    inflection_class = getattr(vocab_word, "declension", 0)
+                    fields[:3] = (vocab_word.masc, vocab_word.fem, vocab_word.neut,)
+
+            records.extend(vocab_struct.pack(
+                vocab_types.index(type(vocab_word)), inflection_class, gender, flags,
+                first_block, counts[2] - first_block, part_count,
+                first_form, first_special_case, counts[4] - first_special_case,
+                *(string_id(field) for field in fields),
+                string_id(getattr(vocab_word, "english", None)),
+                *form_counts))
+            counts[1] += 1
+
+    encoded = [text.encode() for text in strings]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+    string_table = struct.pack(f"<{len(string_offsets)}I", *string_offsets) + b"".join(encoded)
+
+    sections = [(string_table, len(encoded),), (headers, counts[0],), (records, counts[1],),
+        (blocks, counts[2],), (forms, counts[3],), (special_cases, counts[4],)]
+    section_table = []
+    offset = file_header_struct.size
+    for data, count in sections:
+        section_table += [offset, count]
+        offset += len(data)
+
+    # A temporary file of its own, since several processes can compile at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(file_header_struct.pack(MAGIC, COMPILED_VOCAB_VERSION, key.encode(), *source_stats, *section_table))
+            for data, _ in sections:
+                f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def set_source_stats(path: str, source_stats: tuple[int, ...]):
+    """
+    Updates the source stats in the header of the compiled dictionary at `path` in place (eg. once
+    the sources were found unchanged after being touched), so they aren't hashed again on next open
+    """
+    with open(path, 'r+b') as f:
+        f.seek(source_stats_offset)
+        f.write(struct.pack(f"<{SOURCE_STAT_COUNT}q", *source_stats))
+
+
+class CompiledDictionary:
+    """
+    A file written by `write_compiled_vocab`, mapped into memory. Vocab are read through
+    `CompiledView`s, created the first time each is asked for and kept so that the same vocab is
+    always the same object (`Vocab` compares by identity)
+
+    Raises `ValueError` if the file isn't a whole compiled dictionary of this version
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.mmap)
+
+        try:
+            self.read_header()
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            self.close()
+            raise ValueError(f"{path} is not a version {COMPILED_VOCAB_VERSION} compiled dictionary: {e}") from e
+
+        self.views: list[CompiledView|None] = [None] * self.vocab_count
+
+    def read_header(self):
+        """
+        Reads the file header and checks that every section lies within the file, one after the other
+        """
+        if len(self.data) < file_header_struct.size:
+            raise ValueError("too short")
+        magic, version, key, *header = file_header_struct.unpack_from(self.data)
+        if magic != MAGIC or version != COMPILED_VOCAB_VERSION:
+            raise ValueError("wrong magic or version")
+
+        self.key: str = key.decode()
+        self.source_stats: tuple[int, ...] = tuple(header[:SOURCE_STAT_COUNT])
+        section_table = header[SOURCE_STAT_COUNT:]
+        (self.strings_offset, self.string_count, self.headers_offset, self.header_count,
+            self.vocab_offset, self.vocab_count, self.blocks_offset, block_count, self.forms_offset, form_count,
+            self.special_cases_offset, special_case_count) = section_table
+        self.string_blob_offset = self.strings_offset + 4 * (self.string_count + 1)
+
+        if self.string_blob_offset > len(self.data):
+            raise ValueError("string offsets past the end of the file")
+        string_blob_size = struct.unpack_from("<I", self.data, self.strings_offset + 4 * self.string_count)[0]
+
+        end = file_header_struct.size
+        for offset, size in (
+                (self.strings_offset, 4 * (self.string_count + 1) + string_blob_size,),
+                (self.headers_offset, header_struct.size * self.header_count,),
+                (self.vocab_offset, vocab_struct.size * self.vocab_count,),
+                (self.blocks_offset, block_struct.size * block_count,),
+                (self.forms_offset, form_struct.size * form_count,),
+                (self.special_cases_offset, special_case_struct.size * special_case_count,)):
+            if offset != end:
+                raise ValueError(f"section at {offset} instead of {end}")
+            end += size
+        if end != len(self.data):
+            raise ValueError(f"{len(self.data)} bytes instead of {end}")
+
+    def close(self):
+        """
+        Unmaps the file. Views must not be used afterwards
+        """
+        self.data.release()
+        self.mmap.close()
+
+    def string(self, string_id: int) -> str|None:
+        if string_id == NO_STRING:
+            return None
+        start, end = struct.unpack_from("<II", self.data, self.strings_offset + 4 * string_id)
+        return str(self.data[self.string_blob_offset + start:self.string_blob_offset + end], "utf-8")
+
+    def form(self, index: int) -> str|None:
+        return self.string(form_struct.unpack_from(self.data, self.forms_offset + form_struct.size * index)[0])
+
+    def record(self, index: int) -> VocabRecord:
+        return VocabRecord._make(vocab_struct.unpack_from(self.data, self.vocab_offset + vocab_struct.size * index))
+
+    def __len__(self):
+        return self.vocab_count
+
+    def __getitem__(self, index: int) -> vocab.Vocab:
+        if (view := self.views[index]) is None:
+            view_type = view_types[vocab_types[self.data[self.vocab_offset + vocab_struct.size * index]]]
+            view = self.views[index] = view_type(self, index)
+        return view
+
+    def get_headers(self) -> Iterator[tuple[str, range]]:
+        """
+        Yields every header name and the indexes of the vocab under it
+        """
+        for i in range(self.header_count):
+            name, first, count = header_struct.unpack_from(self.data, self.headers_offset + header_struct.size * i)
+            yield self.string(name), range(first, first + count)
+
+    def get_vocab(self) -> dict[str,list[vocab.Vocab]]:
+        """
+        Returns the vocab by header like `loader.get_parsed_vocab`
+        """
+        return {name: [self[i] for i in indexes] for name, indexes in self.get_headers()}
+
+
+class CompiledForms:
+    """
+    Read-only list of `count` forms stored from `first` in the forms section of a `CompiledDictionary`.
+    Stands in for a `vocab.Paradigm`
+    """
+    __slots__ = ("dictionary", "first", "count")
+
+    def __init__(self, dictionary: CompiledDictionary, first: int, count: int):
+        self.dictionary = dictionary
+        self.first = first
+        self.count = count
+
+    def __getitem__(self, index: int) -> str|None:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("CompiledForms index out of range")
+        return self.dictionary.form(self.first + index)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return (self.dictionary.form(self.first + i) for i in range(self.count))
+
+    def __repr__(self) -> str:
+        return f"CompiledForms({list(self)})"
+
+
+class CompiledConjugations:
+    """
+    Read-only `vocab.Conjugations` of a `CompiledVerb`
+    """
+    __slots__ = ("verb",)
+
+    def __init__(self, verb: CompiledVerb):
+        self.verb = verb
+
+    def __getitem__(self, mood: vocab.Mood) -> CompiledForms|str|None:
+        record = self.verb.record
+        count = record.form_counts[mood]
+        if count == NO_FORMS:
+            return None
+
+        # Moods are stored one after the other
+        first = record.first_form
+        for previous_count in record.form_counts[:mood]:
+            if previous_count == SINGLE_FORM:
+                first += 1
+            elif previous_count != NO_FORMS:
+                first += previous_count
+
+        if count == SINGLE_FORM:
+            return self.verb.dictionary.form(first)
+        return CompiledForms(self.verb.dictionary, first, count)
+
+    def __len__(self):
+        return len(vocab.Mood)
+
+    def __iter__(self):
+        return (self[mood] for mood in vocab.Mood)
+
+
+class CompiledView:
+    """
+    Base of the views of the vocab in a `CompiledDictionary`. Each view subclasses the `Vocab`
+    class it stands in for, with the attributes read from the record of vocab `index`.
+    Views are read-only and always loaded (see `Vocab.load`)
+
+    Subclasses declare the `("dictionary", "index")` slots, since a base with slots of its own
+    couldn't be combined with the `Vocab` classes
+    """
+    __slots__ = ()
+
+    base_type: type[vocab.Vocab] = vocab.Vocab
+
+    def __init__(self, dictionary: CompiledDictionary, index: int):
+        self.dictionary = dictionary
+        self.index = index
+        self._clean_description = None
+
+    @property
+    def record(self) -> VocabRecord:
+        return self.dictionary.record(self.index)
+
+    def field(self, i: int) -> str|None:
+        return self.dictionary.string(self.record.fields[i])
+
+    @property
+    def vocab_type(self) -> type[vocab.Vocab]:
+        return self.base_type
+
+    @property
+    def parsed_description(self) -> list[tuple[str, vocab.DescBlockType]]:
+        record = self.record
+        data = self.dictionary.data
+        offset = self.dictionary.blocks_offset
+        parsed_description = []
+        for i in range(record.first_block, record.first_block + record.block_count):
+            text, block_type = block_struct.unpack_from(data, offset + block_struct.size * i)
+            parsed_description.append((self.dictionary.string(text), block_types[block_type],))
+        return parsed_description
+
+    @property
+    def loaded(self) -> bool:
+        return self.record.flags & FLAG_LOADED != 0
+
+    def load(self):
+        pass
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.get_clean_description()!r})"
+
+
+class CompiledVerb(CompiledView, vocab.Verb):
+    __slots__ = ("dictionary", "index")
+
+    base_type = vocab.Verb
+
+    @property
+    def principal_parts(self) -> vocab.PrincipalParts:
+        return tuple(self.field(i) for i in range(self.record.part_count))
+
+    @property
+    def english(self) -> str|None:
+        return self.dictionary.string(self.record.english)
+
+    @property
+    def conjugation(self) -> int:
+        return self.record.inflection_class
+
+    @property
+    def conjugations(self) -> CompiledConjugations:
+        return CompiledConjugations(self)
+
+    @property
+    def special_cases(self) -> dict[int,str]:
+        record = self.record
+        data = self.dictionary.data
+        offset = self.dictionary.special_cases_offset
+        special_cases = {}
+        for i in range(record.first_special_case, record.first_special_case + record.special_case_count):
+            special_key, form = special_case_struct.unpack_from(data, offset + special_case_struct.size * i)
+            special_cases[special_key] = self.dictionary.string(form)
+        return special_cases
+
+
+class CompiledNoun(CompiledView, vocab.Noun):
+    __slots__ = ("dictionary", "index")
+
+    base_type = vocab.Noun
+
+    @property
+    def nom_sg(self) -> str:
+        return self.field(0)
+
+    @property
+    def gen_sg(self) -> str:
+        return self.field(1)
+
+    @property
+    def base(self) -> str|None:
+        return self.field(2)
+
+    @property
+    def english(self) -> str|None:
+        return self.dictionary.string(self.record.english)
+
+    @property
+    def gender(self) -> vocab.Gender:
+        return vocab.Gender(self.record.gender)
+
+    @property
+    def declension(self) -> int:
+        return self.record.inflection_class
+
+    @property
+    def plural_only(self) -> bool:
+        return self.record.flags & FLAG_PLURAL_ONLY != 0
+
+    @property
+    def cases(self) -> CompiledForms:
+        record = self.record
+        return CompiledForms(self.dictionary, record.first_form, record.forms0)
+
+
+class CompiledAdjective(CompiledView, vocab.Adjective):
+    __slots__ = ("dictionary", "index")
+
+    base_type = vocab.Adjective
+
+    @property
+    def masc(self) -> str:
+        return self.field(0)
+
+    @property
+    def fem(self) -> str:
+        return self.field(1)
+
+    @property
+    def neut(self) -> str:
+        return self.field(2)
+
+    @property
+    def english(self) -> str|None:
+        return self.dictionary.string(self.record.english)
+
+    @property
+    def declension(self) -> int:
+        return self.record.inflection_class
+
+
+view_types: dict[type[vocab.Vocab], type[CompiledView]] = {
+    vocab.Verb: CompiledVerb,
+    vocab.Noun: CompiledNoun,
+    vocab.Adjective: CompiledAdjective,
+}
+# The other vocab types have no attributes beyond the description
+for vocab_type in vocab_types:
+    if vocab_type not in view_types:
+        view_types[vocab_type] = type(f"Compiled{vocab_type.__name__}", (CompiledView, vocab_type,),
+            {"__slots__": ("dictionary", "index",), "base_type": vocab_type})
@@ -1,68 +1,372 @@
+from collections import OrderedDict, deque
 from enum import Enum
+from types import MappingProxyType
+from typing import Callable, Mapping, Sequence
+import argparse
 import asyncio
+import functools
+import json
+import logging
+import multiprocessing
 import random
+import threading
+import time
 import discord
 
 import vocab
 import loader
+from scheduler import Scheduler, Card
+from storage import ProgressStore
 
 class Filter:
     def __init__(self):
         pass
 
+class StudyIndex:
+    """
+    Read-only indexes of the vocab, built once when the bot starts and shared by every `Teacher`
+    """
+
+    def __init__(self, vocab_list:dict[str,list[vocab.Vocab]]):
+        self.by_header:Mapping[str,tuple[vocab.Vocab, ...]] = MappingProxyType(
+            {header: tuple(chapter_vocab) for header, chapter_vocab in vocab_list.items()})
+        self.all_vocab:tuple[vocab.Vocab, ...] = tuple(
+            vocab_word for chapter_vocab in self.by_header.values() for vocab_word in chapter_vocab)
+
+        by_type:dict[type,list[vocab.Vocab]] = {}
+        by_conjugation:dict[int,list[vocab.Verb]] = {}
+        by_declension:dict[int,list[vocab.Noun]] = {}
+        for vocab_word in self.all_vocab:
+            by_type.setdefault(vocab_word.vocab_type, []).append(vocab_word)
+            if isinstance(vocab_word, vocab.Verb):
+                by_conjugation.setdefault(vocab_word.conjugation, []).append(vocab_word)
+            elif isinstance(vocab_word, vocab.Noun):
+                by_declension.setdefault(vocab_word.declension, []).append(vocab_word)
+
+        self.by_type:Mapping[type,tuple[vocab.Vocab, ...]] = self.freeze(by_type)
+        self.by_conjugation:Mapping[int,tuple[vocab.Verb, ...]] = self.freeze(by_conjugation)
+        self.by_declension:Mapping[int,tuple[vocab.Noun, ...]] = self.freeze(by_declension)
+        self.verbs:tuple[vocab.Verb, ...] = self.by_type.get(vocab.Verb, ())
+
+        self.inflection_index = vocab.InflectionIndex(self.all_vocab)
+        self.parsable_vocab:tuple[vocab.Vocab, ...] = tuple(
+            vocab_word for vocab_word in self.all_vocab if len(self.get_forms(vocab_word)) > 0)
+        self.card_vocab:Mapping[str,vocab.Vocab] = MappingProxyType(
+            {self.card_key(vocab_word): vocab_word for vocab_word in self.all_vocab})
+
+    @staticmethod
+    def freeze(groups:dict) -> Mapping:
+        return MappingProxyType({key: tuple(group) for key, group in groups.items()})
+
+    @staticmethod
+    def card_key(vocab_word:vocab.Vocab) -> str:
+        """
+        Identifies `vocab_word` in the `ProgressStore` across restarts
+        """
+        return vocab_word.get_clean_description()
+
+    @staticmethod
+    def get_forms(vocab_word:vocab.Vocab) -> list[str]:
+        """
+        Returns the inflected forms of `vocab_word` that can be asked in a parsing question
+        """
+        if isinstance(vocab_word, vocab.Verb):
+            return [form for form in vocab_word.conjugations[vocab.Mood.Indicative] if form]
+        if isinstance(vocab_word, vocab.Noun):
+            return [form for form in vocab_word.cases if form]
+        return []
+
+    @staticmethod
+    def get_headword(vocab_word:vocab.Vocab) -> str:
+        if isinstance(vocab_word, vocab.Verb):
+            return ", ".join(part for part in vocab_word.principal_parts if part)
+        if isinstance(vocab_word, vocab.Noun):
+            return f"{vocab_word.nom_sg}, {vocab_word.gen_sg}"
+        return vocab_word.get_clean_description()
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, in bursts of up to `capacity`
+    """
+
+    def __init__(self, rate:float, capacity:float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self.refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self.refill()
+        self.tokens -= 1
+
+
+class SendQueue:
+    """
+    Outgoing messages and reactions of one channel, sent in order by a single worker task that is
+    paced by token buckets to stay under Discord's rate limits
+
+    Messages queued together (eg. an answer and the next question) or while waiting for the
+    rate limit are coalesced into one message when they fit
+    """
+
+    message_rate = 1.0
+    message_burst = 5
+    reaction_rate = 4.0
+    reaction_burst = 4
+    max_message_length = 2000
+    separator = "\n\n"
+
+    def __init__(self, channel:discord.abc.Messageable):
+        self.channel = channel
+        self.message_bucket = TokenBucket(self.message_rate, self.message_burst)
+        self.reaction_bucket = TokenBucket(self.reaction_rate, self.reaction_burst)
+
+        # `("message", content, future)` or `("reaction", message, emoji)`
+        self.pending:deque[tuple] = deque()
+        self.worker:asyncio.Task|None = None
+
+    def send(self, content:str) -> asyncio.Future[discord.Message]:
+        """
+        Queues `content`; the returned future is the message it was sent in
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(("message", content, future,))
+        self.start()
+        return future
+
+    def react(self, message:discord.Message, emoji:str):
+        self.pending.append(("reaction", message, emoji,))
+        self.start()
+
+    def start(self):
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self.run())
+
+    def pop_messages(self, content:str) -> tuple[str, int]:
+        """
+        Appends the messages queued right after the current one to `content` while they fit.
+        Returns the coalesced content and the number of queued messages it includes
+        """
+        count = 0
+        for kind, next_content, _ in self.pending:
+            if kind != "message" or len(content) + len(self.separator) + len(next_content) > self.max_message_length:
+                break
+            content += self.separator + next_content
+            count += 1
+        return content, count
+
+    async def run(self):
+        # Lets every task queue what it sends in this iteration of the event loop first
+        await asyncio.sleep(0)
+
+        while len(self.pending) > 0:
+            kind, target, value = self.pending.popleft()
+
+            if kind == "reaction":
+                await self.reaction_bucket.acquire()
+                try:
+                    await target.add_reaction(value)
+                except Exception as e:
+                    logging.warning(f"Could not add reaction {value}: {e}")
+                continue
+
+            await self.message_bucket.acquire()
+            content, count = self.pop_messages(target)
+            futures = [value] + [self.pending.popleft()[2] for _ in range(count)]
+            try:
+                message = await self.channel.send(content)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(message)
+
+
 class Teacher:
     class State(Enum):
         Waiting = 0
         Started = 1
+        Parsing = 2
 
-    vocab_list:dict[str,list[vocab.Vocab]] = None
-
-    @classmethod
-    def load_vocab_list(cls):
-        if cls.vocab_list is None:
-            cls.vocab_list = loader.get_parsed_vocab()
+    correct_emoji = '\U00002705'
+    wrong_emoji = '\U0000274E'
+    review_qualities = {correct_emoji: 5, wrong_emoji: 1}
+    """
+    SM-2 quality of the reactions to an answer
+    """
+    max_review_messages = 32
 
-    def __init__(self, student:str, channel: discord.abc.Messageable):
+    def __init__(self, student:discord.abc.User, channel: discord.abc.Messageable, study_index:StudyIndex,
+            store:ProgressStore|None = None, get_outbox:Callable[[discord.abc.Messageable], SendQueue]|None = None):
         self.student = student
         self.channel = channel
+        self.study_index = study_index
+        self.store = store
+        # Without a shared `get_outbox` (see `MyClient.get_outbox`) each channel gets a queue of its own
+        self.get_outbox = get_outbox if get_outbox is not None else functools.cache(SendQueue)
 
         self.study_set_msg = None
 
         self.state = self.State.Waiting
         self.previous_message = None
-        self.background_tasks = set()
-        
-        self.load_vocab_list()
+        self.last_active = time.monotonic()
+        # Messages being handled; a busy session isn't evicted as it would be spilled half way
+        self.busy = 0
+
+        # `"study"` and `"parsing"` questions are scheduled separately
+        self.schedulers:dict[str, Scheduler] = {}
+        # Cards loaded by `restore` that are added once the mode's scheduler is created
+        self.restored_cards:dict[str, list[Card]] = {}
+        # Id of each answer message to the mode and card its reactions review
+        self.review_messages:dict[int, tuple[str, vocab.Vocab]] = {}
+
+    async def restore(self):
+        """
+        Loads the student's session and cards from `self.store` without blocking the event loop
+        """
+        if self.store is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        state, spilled, self.restored_cards = await loop.run_in_executor(None, self.store.load_student, self.student.id)
+        if state is not None:
+            self.state = self.State(state)
+        if spilled is not None:
+            self.unspill(json.loads(spilled))
+
+    def spill(self):
+        """
+        Saves the state that isn't written through to `self.store` as it changes (the unanswered
+        question and the answers awaiting a reaction) so the session can be evicted; `restore`
+        picks it up again
+        """
+        if self.store is None:
+            return
+
+        card_key = self.study_index.card_key
+        question = None
+        if self.previous_message is not None:
+            # `(message, verb)` for study questions, `(message, form, vocab)` for parsing questions
+            question = [card_key(self.previous_message[-1]), *self.previous_message[1:-1]]
+        reviews = [[message_id, mode, card_key(card)] for message_id, (mode, card) in self.review_messages.items()]
+
+        self.store.save_session(self.student.id, self.state.value, json.dumps({"question": question, "reviews": reviews}))
+
+    def unspill(self, spilled:dict):
+        card_vocab = self.study_index.card_vocab
+        if (question := spilled["question"]) is not None and (card := card_vocab.get(question[0])) is not None:
+            self.previous_message = (None, *question[1:], card,)
+
+        for message_id, mode, card_key in spilled["reviews"]:
+            if (card := card_vocab.get(card_key)) is not None:
+                self.review_messages[message_id] = (mode, card,)
+
+    @property
+    def outbox(self) -> SendQueue:
+        return self.get_outbox(self.channel)
+
+    def set_state(self, state:State):
+        self.state = state
+        if self.store is not None:
+            self.store.save_session(self.student.id, state.value)
+
+    def get_scheduler(self, mode:str, cards:Sequence[vocab.Vocab]) -> Scheduler:
+        if (scheduler := self.schedulers.get(mode)) is None:
+            # Seeded by student so a restored session draws new cards in the same order
+            scheduler = self.schedulers[mode] = Scheduler(cards, seed=f"{self.student.id}:{mode}")
+
+            restored_cards = self.restored_cards.pop(mode, [])
+            for card in restored_cards:
+                card.key = self.study_index.card_vocab.get(card.key)
+            scheduler.add_cards(card for card in restored_cards if card.key is not None)
+        return scheduler
 
     async def send_study_set_msg(self):
         message = f"*Filters:*\nHeader: `{None}`"
-        self.study_set_message = await self.channel.send(message)
+        outbox = self.outbox
+        self.study_set_message = await outbox.send(message)
 
         emoji_1 = '\U00000031'
 
         for i in range(9):
-            task = asyncio.create_task(self.study_set_message.add_reaction(chr(ord(emoji_1)+i) + "\U000020E3"))
-            self.background_tasks.add(task)
-            task.add_done_callback(self.background_tasks.discard)
+            outbox.react(self.study_set_message, chr(ord(emoji_1)+i) + "\U000020E3")
     
     async def send_study_question(self):
-        self.verbs:list[vocab.Verb] = []
-        if len(self.verbs) == 0:
-            for chapter, chapter_vocab in self.vocab_list.items():
-                for vocab_word in chapter_vocab:
-                    if isinstance(vocab_word, vocab.Verb):
-                        self.verbs.append(vocab_word)
-
-        verb = random.choice(self.verbs)
+        verb = self.get_scheduler("study", self.study_index.verbs).next_card()
 
+        # Set before the send, which may wait on the rate limit, so an answer arriving meanwhile
+        # is checked against this question
+        question = self.previous_message = (None, verb)
         message = random.choice(verb.principal_parts)
-        message = await self.channel.send(message)
+        message = await self.outbox.send(message)
 
-        self.previous_message = (message, verb)
+        if self.previous_message is question:
+            self.previous_message = (message, verb)
     
-    async def send_study_question_answer(self):
+    async def send_parsing_question(self):
+        vocab_word = self.get_scheduler("parsing", self.study_index.parsable_vocab).next_card()
+        form = random.choice(self.study_index.get_forms(vocab_word))
+
+        # See `send_study_question`
+        question = self.previous_message = (None, form, vocab_word)
+        message = await self.outbox.send(f"Parse **{form}**")
+
+        if self.previous_message is question:
+            self.previous_message = (message, form, vocab_word)
+
+    async def send_parsing_question_answer(self, previous_message:tuple):
+        form = previous_message[1]
+
+        message = ""
+        for vocab_word, parsing in self.study_index.inflection_index.lookup(form):
+            message += f"{parsing} of **{self.study_index.get_headword(vocab_word)}**\n"
+
+        message = await self.outbox.send(message)
+
+        self.add_review_reactions(message, "parsing", previous_message[2])
+
+    def add_review_reactions(self, message:discord.Message, mode:str, card:vocab.Vocab):
+        """
+        Adds the ✅/❎ reactions to an answer; the student's reaction reviews `card` (see `reaction`)
+        """
+        self.review_messages[message.id] = (mode, card)
+        if len(self.review_messages) > self.max_review_messages:
+            del self.review_messages[next(iter(self.review_messages))]
+
+        outbox = self.outbox
+        for emoji in (self.correct_emoji, self.wrong_emoji):
+            outbox.react(message, emoji)
+
+    async def reaction(self, message_id:int, emoji:str):
+        quality = self.review_qualities.get(emoji)
+        if quality is None or (review := self.review_messages.pop(message_id, None)) is None:
+            return
+
+        mode, card = review
+        scheduler = self.get_scheduler(mode, self.study_index.verbs if mode == "study" else self.study_index.parsable_vocab)
+        now = time.time()
+        scheduler.review(card, quality, now)
+
+        if self.store is not None:
+            card_key = self.study_index.card_key(card)
+            self.store.save_card(self.student.id, mode, card_key, scheduler.cards[card])
+            self.store.add_review(self.student.id, mode, card_key, quality, now)
+
+    async def send_study_question_answer(self, previous_message:tuple):
         message = ""
-        for desc, desc_type in self.previous_message[1].get_parsed_description():
+        for desc, desc_type in previous_message[1].get_parsed_description():
             match desc_type:
                 case vocab.DescBlockType.Latin:
                     desc = "**" + desc + "**"
@@ -72,12 +376,9 @@ class Teacher:
                     continue
             message += desc
 
-        message = await self.channel.send(message)
+        message = await self.outbox.send(message)
 
-        for emoji in ('\U00002705','\U0000274E'):
-            task = asyncio.create_task(message.add_reaction(emoji))
-            self.background_tasks.add(task)
-            task.add_done_callback(self.background_tasks.discard)
+        self.add_review_reactions(message, "study", previous_message[1])
         
     
     async def message(self, message):
@@ -86,36 +387,265 @@ class Teacher:
         if message_content[0] == '.':
             message_content = message_content[1:]
         
-        if self.state == self.state.Started:
-            await self.send_study_question_answer()
+        # Everything is queued at once so the answer and the next question go out as one message
+        replies = []
+
+        # No question was asked yet if the session was restored from `self.store`
+        if self.previous_message is not None:
+            if self.state == self.state.Started:
+                replies.append(self.send_study_question_answer(self.previous_message))
+            elif self.state == self.state.Parsing:
+                replies.append(self.send_parsing_question_answer(self.previous_message))
         
         match message_content:
             case "help":
                 pass
             case "study-set":
-                await self.send_study_set_msg()
+                replies.append(self.send_study_set_msg())
             case "start":
-                self.state = self.state.Started
+                self.set_state(self.State.Started)
+            case "parse":
+                self.set_state(self.State.Parsing)
             case "stop":
-                self.state = self.state.Waiting
-                self.previous_message == None
+                self.set_state(self.State.Waiting)
+                self.previous_message = None
         
         if self.state == self.state.Started:
-            await self.send_study_question()
+            replies.append(self.send_study_question())
+        elif self.state == self.state.Parsing:
+            replies.append(self.send_parsing_question())
+
+        await asyncio.gather(*replies)
 
 
 class MyClient(discord.Client):
-    def __init__(self):
+    class Readiness(Enum):
+        Loading = 0
+        Ready = 1
+        Failed = 2
+
+    max_teachers = 1000
+    """
+    Default sessions kept in memory; the least recently used ones are evicted to `self.store` beyond that
+    """
+    teacher_ttl = 30 * 60
+    """
+    Default seconds of inactivity after which a session is evicted
+    """
+    sweep_interval = 60
+
+    loading_reply = "Still loading the dictionary, I will answer in a moment"
+    failed_reply = "The dictionary failed to load, I cannot teach right now"
+
+    def __init__(self, store_path:str = "progress.sqlite3", vocab_path:str = "LatinDictionary.html",
+            shard_id:int|None = None, shard_count:int|None = None, inboxes:Sequence[multiprocessing.Queue]|None = None,
+            max_teachers:int|None = None, teacher_ttl:float|None = None):
+        """
+        `max_teachers` and `teacher_ttl` override the class defaults of the same name
+        """
         intents = discord.Intents.default()
         intents.message_content = True
         intents.members = True
 
-        super().__init__(intents=intents)
+        # Each shard only gets the events of its share of the guilds (Discord sends every DM to
+        # shard 0), but every student is owned by one shard (see `owner_shard`). The other shards
+        # forward the student's events to the owner's queue in `inboxes`
+        super().__init__(intents=intents, shard_id=shard_id, shard_count=shard_count)
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.shard_label = "" if shard_id is None else f" (shard {shard_id}/{shard_count})"
+        self.inboxes = inboxes
+        self.receive_thread:threading.Thread|None = None
 
-        self.teachers:dict[str,Teacher] = {}
+        if max_teachers is not None:
+            self.max_teachers = max_teachers
+        if teacher_ttl is not None:
+            self.teacher_ttl = teacher_ttl
+        # Least recently active first
+        self.teachers:OrderedDict[discord.abc.User,Teacher] = OrderedDict()
+        self.restoring:dict[discord.abc.User,asyncio.Future[Teacher]] = {}
+        self.sweep_task:asyncio.Task|None = None
+        # Sharded clients are started by `main`, which creates the store's tables beforehand
+        self.store = ProgressStore(store_path, create_schema=shard_id is None)
+        self.outboxes:dict[int,SendQueue] = {}
+
+        # Loaded by `on_ready` in an executor, messages wait for `self.loaded` until then
+        self.vocab_path = vocab_path
+        self.study_index:StudyIndex|None = None
+        self.readiness = self.Readiness.Loading
+        self.loaded = asyncio.Event()
+        self.load_task:asyncio.Task|None = None
+        # Channels already told that the bot is still loading
+        self.deferred_channels:set[int] = set()
+
+    def get_outbox(self, channel:discord.abc.Messageable) -> SendQueue:
+        """
+        Returns the `SendQueue` of `channel`, shared by every `Teacher` in that channel
+        """
+        if (outbox := self.outboxes.get(channel.id)) is None:
+            outbox = self.outboxes[channel.id] = SendQueue(channel)
+        outbox.channel = channel
+        return outbox
+
+    @property
+    def is_ready_to_teach(self) -> bool:
+        return self.readiness == self.Readiness.Ready
 
     async def on_ready(self):
-        print(f'We have logged in as {self.user}')
+        print(f'We have logged in as {self.user}{self.shard_label}')
+
+        # `on_ready` is dispatched again after reconnecting
+        if self.load_task is None:
+            self.load_task = asyncio.create_task(self.load_study_index())
+        if self.sweep_task is None:
+            self.sweep_task = asyncio.create_task(self.sweep_idle_teachers())
+        if self.inboxes is not None and self.receive_thread is None:
+            self.receive_thread = threading.Thread(target=self.receive_forwarded, args=(asyncio.get_running_loop(),),
+                daemon=True)
+            self.receive_thread.start()
+
+    def owner_shard(self, student:discord.abc.User) -> int|None:
+        """
+        Returns the shard that keeps the session of `student` and their rows in `self.store`, or
+        `None` if the bot isn't sharded
+        """
+        if self.shard_count is None:
+            return None
+        return student.id % self.shard_count
+
+    def forward(self, student:discord.abc.User, *event) -> bool:
+        """
+        Puts `event` in the queue of the shard owning `student` unless it is this one. Returns
+        whether it was forwarded
+        """
+        owner = self.owner_shard(student)
+        if owner is None or owner == self.shard_id or self.inboxes is None:
+            return False
+        self.inboxes[owner].put(event)
+        return True
+
+    def receive_forwarded(self, loop:asyncio.AbstractEventLoop):
+        """
+        Hands the events the other shards forward to this one to the event loop. Runs on a thread
+        of its own, as reading the queue blocks
+        """
+        inbox = self.inboxes[self.shard_id]
+        while True:
+            event = inbox.get()
+            asyncio.run_coroutine_threadsafe(self.on_forwarded(*event), loop)
+
+    async def on_forwarded(self, kind:str, channel_id:int, message_id:int, *args):
+        """
+        Handles a message or reaction forwarded by `forward`. Only ids cross the processes, so the
+        message and the user are fetched again
+        """
+        channel = self.get_channel(channel_id) or self.get_partial_messageable(channel_id)
+        try:
+            match kind:
+                case "message":
+                    await self.handle_message(await channel.fetch_message(message_id))
+                case "reaction":
+                    user_id, emoji = args
+                    user = self.get_user(user_id) or await self.fetch_user(user_id)
+                    await self.handle_reaction(user, channel, message_id, emoji)
+        except discord.HTTPException as e:
+            logging.warning(f"Could not fetch the {kind} forwarded to{self.shard_label}: {e}")
+
+    async def get_teacher(self, student:discord.abc.User, channel:discord.abc.Messageable) -> Teacher:
+        """
+        Returns the session of `student`, restoring it from `self.store` if it isn't in memory
+        """
+        if (teacher := self.teachers.get(student)) is None:
+            # Every event of the student arriving while restoring waits for the same session
+            if (restoring := self.restoring.get(student)) is None:
+                restoring = self.restoring[student] = asyncio.ensure_future(self.restore_teacher(student, channel))
+            teacher = await restoring
+
+        # Put back in case it was evicted while this event waited for the restore
+        self.teachers[student] = teacher
+        self.teachers.move_to_end(student)
+        teacher.last_active = time.monotonic()
+
+        self.evict_over_capacity(keep=student)
+        return teacher
+
+    async def restore_teacher(self, student:discord.abc.User, channel:discord.abc.Messageable) -> Teacher:
+        teacher = Teacher(student, channel, self.study_index, self.store, self.get_outbox)
+        try:
+            await teacher.restore()
+        finally:
+            del self.restoring[student]
+        return teacher
+
+    def evict_teacher(self, student:discord.abc.User):
+        self.teachers.pop(student).spill()
+
+    def evict_over_capacity(self, keep:discord.abc.User|None = None):
+        """
+        Evicts the least recently active sessions beyond `max_teachers`, except busy ones and `keep`
+        """
+        if len(self.teachers) <= self.max_teachers:
+            return
+
+        idle = [student for student, teacher in self.teachers.items() if teacher.busy == 0 and student != keep]
+        for student in idle[:len(self.teachers) - self.max_teachers]:
+            self.evict_teacher(student)
+
+    def evict_idle(self):
+        """
+        Evicts the sessions inactive for `teacher_ttl` and drops the send queues with nothing to send
+        """
+        now = time.monotonic()
+        for student, teacher in list(self.teachers.items()):
+            if now - teacher.last_active < self.teacher_ttl:
+                break
+            if teacher.busy == 0:
+                self.evict_teacher(student)
+
+        for channel_id, outbox in list(self.outboxes.items()):
+            if len(outbox.pending) == 0 and (outbox.worker is None or outbox.worker.done()):
+                del self.outboxes[channel_id]
+
+    async def sweep_idle_teachers(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.evict_idle()
+
+    async def load_study_index(self):
+        """
+        Opens the compiled vocab (compiling it first if it is out of date) and builds
+        `self.study_index` on a worker thread so the event loop keeps handling events meanwhile
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            self.study_index = await loop.run_in_executor(
+                None, lambda: StudyIndex(loader.get_compiled_vocab(self.vocab_path).get_vocab()))
+        except Exception as e:
+            logging.warning(f"Could not load {self.vocab_path}: {e}")
+            self.readiness = self.Readiness.Failed
+        else:
+            print(f"Loaded {len(self.study_index.all_vocab)} vocab in {time.perf_counter() - start:.2f}s")
+            self.readiness = self.Readiness.Ready
+
+        self.deferred_channels.clear()
+        self.loaded.set()
+
+    async def wait_until_loaded(self, channel:discord.abc.Messageable) -> bool:
+        """
+        Waits for `load_study_index`, telling `channel` once that its messages are deferred.
+        Returns whether the study index is usable
+        """
+        if self.readiness == self.Readiness.Loading:
+            if channel.id not in self.deferred_channels:
+                self.deferred_channels.add(channel.id)
+                await self.get_outbox(channel).send(self.loading_reply)
+            await self.loaded.wait()
+
+        if self.readiness == self.Readiness.Failed:
+            await self.get_outbox(channel).send(self.failed_reply)
+            return False
+        return True
 
     async def on_message(self, message):
         if message.author == self.user:
@@ -127,26 +657,93 @@ class MyClient(discord.Client):
             # print(f"Message:\n{message.content}")
             # print(f"Author:\n{message.author}")
 
-            if (teacher := self.teachers.get(message.author)) is None:
-                teacher = self.teachers[message.author] = Teacher(message.author, message.channel)
-
-            await teacher.message(message)
+            if not self.forward(message.author, "message", message.channel.id, message.id):
+                await self.handle_message(message)
 
             # await message.channel.send('Hello!')
+
+    async def handle_message(self, message):
+        if not await self.wait_until_loaded(message.channel):
+            return
+
+        teacher = await self.get_teacher(message.author, message.channel)
+        teacher.busy += 1
+        try:
+            await teacher.message(message)
+        finally:
+            teacher.busy -= 1
+            self.evict_over_capacity()
     
+    async def close(self):
+        for student in list(self.teachers):
+            self.evict_teacher(student)
+        await asyncio.get_running_loop().run_in_executor(None, self.store.close)
+        await super().close()
+
     async def on_reaction_add(self, reaction, user):
-        if user == self.user:
+        # Only the answers sent by the bot review cards
+        if user == self.user or reaction.message.author != self.user:
             return
-        
-        print(dir(reaction))
+
+        message = reaction.message
+        if not self.forward(user, "reaction", message.channel.id, message.id, user.id, str(reaction.emoji)):
+            await self.handle_reaction(user, message.channel, message.id, str(reaction.emoji))
+
+    async def handle_reaction(self, user:discord.abc.User, channel:discord.abc.Messageable, message_id:int, emoji:str):
+        # Sessions evicted since the answer was sent are restored, with the answers awaiting a reaction
+        if user in self.teachers or self.is_ready_to_teach:
+            teacher = await self.get_teacher(user, channel)
+            teacher.busy += 1
+            try:
+                await teacher.reaction(message_id, emoji)
+            finally:
+                teacher.busy -= 1
+                self.evict_over_capacity()
+
+
+def run_shard(token:str, shard_id:int|None = None, shard_count:int|None = None,
+        store_path:str = "progress.sqlite3", vocab_path:str = "LatinDictionary.html",
+        inboxes:Sequence[multiprocessing.Queue]|None = None, max_teachers:int|None = None, teacher_ttl:float|None = None):
+    client = MyClient(store_path=store_path, vocab_path=vocab_path, shard_id=shard_id, shard_count=shard_count,
+        inboxes=inboxes, max_teachers=max_teachers, teacher_ttl=teacher_ttl)
+    client.run(token)
 
 
 def main():
-    client = MyClient()
+    parser = argparse.ArgumentParser(description="Latin study Discord bot")
+    parser.add_argument("--shards", type=int, default=1,
+        help="number of processes, each connecting as one Discord shard and teaching its share of the students")
+    parser.add_argument("--vocab", default="LatinDictionary.html")
+    parser.add_argument("--store", default="progress.sqlite3", help="SQLite file of the students' progress")
+    parser.add_argument("--max-teachers", type=int, default=MyClient.max_teachers,
+        help="sessions kept in memory by each shard")
+    parser.add_argument("--teacher-ttl", type=float, default=MyClient.teacher_ttl,
+        help="seconds of inactivity after which a session is evicted")
+    args = parser.parse_args()
+    limits = {"max_teachers": args.max_teachers, "teacher_ttl": args.teacher_ttl}
 
     with open("token.txt", 'r') as f:
         token = f.readline().rstrip('\n')
-    client.run(token)
+
+    if args.shards == 1:
+        run_shard(token, store_path=args.store, vocab_path=args.vocab, **limits)
+        return
+
+    # Compiles the dictionary once so every shard maps the same file (and shares its pages). The
+    # shards share the progress store too (WAL handles writers from several processes, each
+    # writing only the rows of the students it owns), so its tables are created or migrated once here
+    loader.get_compiled_vocab(args.vocab).close()
+    ProgressStore.create_schema(args.store)
+
+    # The events of each student are forwarded to the shard owning them through these
+    inboxes = [multiprocessing.Queue() for _ in range(args.shards)]
+    shards = [multiprocessing.Process(target=run_shard,
+        args=(token, shard_id, args.shards, args.store, args.vocab, inboxes,), kwargs=limits, name=f"shard-{shard_id}")
+        for shard_id in range(args.shards)]
+    for shard in shards:
+        shard.start()
+    for shard in shards:
+        shard.join()
 
 
 if __name__ == "__main__":
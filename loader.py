@@ -1,11 +1,19 @@
 from __future__ import annotations
 
 from html.parser import HTMLParser
-from typing import TypeAlias
+from typing import TypeAlias, Iterable, Iterator
+from enum import IntFlag
+from concurrent.futures import ProcessPoolExecutor
 import string
 import logging
+import re
+import hashlib
+import pickle
+import os
+import tempfile
 
 import vocab
+import compiled
 
 
 class PCol:
@@ -100,6 +108,33 @@ def parse_css(data: str) -> Style:
     return stylesheet
 
 
+class StyleFlag(IntFlag):
+    Bold   = 1
+    Italic = 2
+
+
+ClassStyle: TypeAlias = dict[str,StyleFlag]
+
+def compile_style(style: Style) -> ClassStyle:
+    """
+    Returns a dict from class name (without the leading '.') to the `StyleFlag`s its rules set
+    """
+    class_style = {}
+    for selector, rules in style.items():
+        if selector[:1] != '.':
+            continue
+
+        flags = StyleFlag(0)
+        if rules.get("font-weight") == "700":
+            flags |= StyleFlag.Bold
+        if rules.get("font-style") == "italic":
+            flags |= StyleFlag.Italic
+
+        if flags:
+            class_style[selector[1:]] = flags
+    return class_style
+
+
 class LatinDictHTMLParser(HTMLParser):
     def __init__(self):
         super().__init__()
@@ -158,6 +193,23 @@ class HTMLTag:
         self.attrs = attrs
         self.contains = contains
         self.parent = parent
+
+        self.style_flags = StyleFlag(0)
+        """
+        Styles applied by the classes of `self` and its parents (see `inherit_style`)
+        """
+    
+    def inherit_style(self, class_style: ClassStyle):
+        """
+        Sets `self.style_flags` from the classes of `self` and the `style_flags` of its parent.
+        Must be called after the parent's
+        """
+        flags = self.parent.style_flags if self.parent is not None else StyleFlag(0)
+        for attr, val in self.attrs:
+            if attr == "class" and val is not None:
+                for tag_class in val.split(' '):
+                    flags |= class_style.get(tag_class, 0)
+        self.style_flags = flags
     
     def __repr__(self) -> str:
         return f"HTMLTag({self.tag}, {self.attrs}, ..., ...)"
@@ -249,6 +301,9 @@ class MyHTMLParser(HTMLParser):
         self.root: HTMLTag|None = None
         self.current: HTMLTag|None = None
 
+        # Filled in once the `style` tag has been read; the stylesheet comes before the body
+        self.class_style: ClassStyle = {}
+
     def handle_starttag(self, tag, attrs):
         if tag == "meta": # Ignore the meta tag (it doesn't have a matching closing tag)
             return
@@ -262,10 +317,13 @@ class MyHTMLParser(HTMLParser):
             self.current.contains.append(new_tag)
             new_tag.parent = self.current
         
+        new_tag.inherit_style(self.class_style)
         self.current = new_tag
 
     def handle_endtag(self, tag):
         assert(tag == self.current.tag)
+        if tag == "style" and len(self.current.contains) == 1 and isinstance(self.current.contains[0], str):
+            self.class_style = compile_style(parse_css(self.current.contains[0]))
         self.current = self.current.parent
 
     def handle_data(self, data):
@@ -273,88 +331,223 @@ class MyHTMLParser(HTMLParser):
 
 
 class HTMLReader:
-    def __init__(self, parsed_html):
+    def __init__(self, parsed_html: HTMLTag|None, style: Style|None = None):
+        """
+        `parsed_html` is the root of the document. It may be `None` if `style` is given and only
+        `read_block` will be used (see `StreamingVocabParser`)
+        """
         self.parsed_html = parsed_html
 
-        self.style = parsed_html.find("style")
-        assert(len(self.style.contains) == 1 and not isinstance(self.style.contains[0], HTMLTag))
-        self.style = parse_css(self.style.contains[0])
+        if style is None:
+            style_tag = parsed_html.find("style")
+            assert(len(style_tag.contains) == 1 and not isinstance(style_tag.contains[0], HTMLTag))
+            style = parse_css(style_tag.contains[0])
+        self.style = style
+        self.class_style = compile_style(style)
 
         self.vocab_container: HTMLTag|None = None
 
-    def read_html(self) -> dict[str,list[vocab.Vocab]]:
-        resulting_vocab = {}
+        # list of header names where `current_header[n]` represehts the header `n+1`
+        # (ie. h1 would be at n=0, h2 would be at n=2, etc.)
+        self.current_headers: list[str|None] = []
+
+    def read_block(self, html_tag: HTMLTag) -> tuple[str, vocab.Vocab|None] | None:
+        """
+        Reads one child of the vocab container
 
+        Returns `(header name, None)` if `html_tag` starts a new header, `(header name, vocab)` if
+        it is a vocab entry under that header and `None` otherwise
+        """
+
+        # Get the header
+        if len(html_tag.tag) == 2 and html_tag.tag[0] == 'h' and html_tag.tag[1] in "123456789":
+            header_depth = int(html_tag.tag[1])
+            if len(self.current_headers) >= header_depth:
+                self.current_headers = self.current_headers[:header_depth-1]
+
+            elif len(self.current_headers) < header_depth - 1:
+                self.current_headers += [None] * (header_depth - 1 - len(self.current_headers))
+            
+            header_name = ""
+            for data, data_tag in html_tag.flattened_data():
+                if data_tag.tag == "span":
+                    header_name += data.replace('\xa0', ' ') # replace no-break-spaces with regular spaces
+            self.current_headers.append(header_name)
+            print(self.current_headers)
+
+            return (header_name, None,)
+
+        # Get the english/latin vocab
+        elif len(self.current_headers) > 0:
+            if len(self.current_headers) > 1:
+                return None
+            if self.current_headers[-1] == "Numerals": # Numerals are a special case
+                pass
+            else:
+                if html_tag.tag == 'p':
+                    vocab_reader = VocabReader(html_tag)
+                    if (vocab_word := vocab_reader.read_data()) is not None:
+                        return (self.current_headers[-1], vocab_word,)
+
+        return None
+
+    def read_html(self) -> dict[str,list[vocab.Vocab]]:
         self.vocab_container = self.parsed_html.find("h1").parent
+        self.current_headers = []
 
-        # list of header names where `current_header[n]` represehts the header `n+1`
-        # (ie. h1 would be at n=0, h2 would be at n=2, etc.)
-        current_headers: list[str|None] = []
-
-        for html_tag in self.vocab_container.contains:
-            if not isinstance(html_tag, HTMLTag):
-                continue
-
-            # Get the header
-            if len(html_tag.tag) == 2 and html_tag.tag[0] == 'h' and html_tag.tag[1] in "123456789":
-                header_depth = int(html_tag.tag[1])
-                if len(current_headers) >= header_depth:
-                    current_headers = current_headers[:header_depth-1]
-
-                elif len(current_headers) < header_depth - 1:
-                    current_headers += [None] * (header_depth - 1 - len(current_headers))
-                
-                header_name = ""
-                for data, data_tag in html_tag.flattened_data():
-                    if data_tag.tag == "span":
-                        header_name += data.replace('\xa0', ' ') # replace no-break-spaces with regular spaces
-                current_headers.append(header_name)
-                print(current_headers)
-
-                resulting_vocab[header_name] = []
-
-            # Get the english/latin vocab
-            elif len(current_headers) > 0:
-                if len(current_headers) > 1:
+        def read_blocks():
+            for html_tag in self.vocab_container.contains:
+                if not isinstance(html_tag, HTMLTag):
                     continue
-                if current_headers[-1] == "Numerals": # Numerals are a special case
-                    pass
-                else:
-                    if html_tag.tag == 'p':
-                        vocab_reader = VocabReader(self.style, html_tag)
-                        if (vocab := vocab_reader.read_data()) is not None:
-                            assert len(current_headers) >= 1 and current_headers[-1] in resulting_vocab
-                            resulting_vocab[current_headers[-1]].append(vocab)
+                if (block := self.read_block(html_tag)) is not None:
+                    yield block
+
+        return collect_vocab(read_blocks())
+
+
+def collect_vocab(blocks: Iterable[tuple[str, vocab.Vocab|None]]) -> dict[str,list[vocab.Vocab]]:
+    """
+    Gathers the output of `HTMLReader.read_block` into a dict from header to the vocab under it
+    """
+    resulting_vocab = {}
+    for header_name, vocab_word in blocks:
+        if vocab_word is None:
+            resulting_vocab[header_name] = []
+        else:
+            assert header_name in resulting_vocab
+            resulting_vocab[header_name].append(vocab_word)
+    return resulting_vocab
 
-        return resulting_vocab
+
+class StreamingVocabParser(HTMLParser):
+    """
+    Single pass alternative to `MyHTMLParser` followed by `HTMLReader.read_html`
+
+    Only the open tags and the block (header or paragraph) currently being read are kept as
+    `HTMLTag`s. Every block is handed to `HTMLReader.read_block` as soon as it closes and
+    the results can be taken with `pop_parsed` while the rest of the document is still being fed
+    """
+    def __init__(self):
+        super().__init__()
+
+        self.current: HTMLTag|None = None
+        self.vocab_container: HTMLTag|None = None
+        self.html_reader: HTMLReader|None = None
+
+        # `recording[n]` is whether the contents of the `n`th open tag are kept
+        self.recording: list[bool] = []
+        self.parsed: list[tuple[str, vocab.Vocab|None]] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta": # Ignore the meta tag (it doesn't have a matching closing tag)
+            return
+
+        new_tag = HTMLTag(tag, attrs, [], self.current)
+        if self.html_reader is not None:
+            new_tag.inherit_style(self.html_reader.class_style)
+
+        # Sections from `split_html_sections` can start at an h2
+        if self.vocab_container is None and tag in ("h1", "h2",):
+            self.vocab_container = self.current
+
+        recording = tag == "style" or (self.current is not None and (
+            self.recording[-1] or self.current is self.vocab_container))
+        if recording and self.current is not self.vocab_container:
+            self.current.contains.append(new_tag)
+
+        self.recording.append(recording)
+        self.current = new_tag
+
+    def handle_endtag(self, tag):
+        assert(tag == self.current.tag)
+
+        if tag == "style":
+            assert(len(self.current.contains) == 1 and not isinstance(self.current.contains[0], HTMLTag))
+            self.html_reader = HTMLReader(None, parse_css(self.current.contains[0]))
+
+        elif self.current.parent is not None and self.current.parent is self.vocab_container:
+            if (block := self.html_reader.read_block(self.current)) is not None:
+                self.parsed.append(block)
+
+        self.recording.pop()
+        self.current = self.current.parent
+
+    def handle_data(self, data):
+        if not self.recording[-1]:
+            return
+
+        # Data can arrive in pieces when it straddles two calls to `feed`
+        if len(self.current.contains) > 0 and isinstance(self.current.contains[-1], str):
+            self.current.contains[-1] += data
+        else:
+            self.current.contains.append(data)
+
+    def pop_parsed(self) -> list[tuple[str, vocab.Vocab|None]]:
+        """
+        Returns the blocks read since the last call (see `HTMLReader.read_block`)
+        """
+        parsed = self.parsed
+        self.parsed = []
+        return parsed
+
+
+class VocabFeatures:
+    """
+    The part of speech markers and word shapes of a vocab entry, gathered in a single scan of
+    `VocabReader.vocab_data` so `VocabReader.determine_vocab_type` doesn't rescan it per type
+    """
+
+    # Abbreviations marking a part of speech, outside of the latin, as whole words
+    marker_regex = re.compile(r"(?<![A-Za-z])(adv|pron|prep|conj|interj)\.(?![A-Za-z])")
+    marker_types = {
+        "adv": vocab.VocabType.Adverb,
+        "pron": vocab.VocabType.Pronoun,
+        "prep": vocab.VocabType.Preposition,
+        "conj": vocab.VocabType.Conjunction,
+        "interj": vocab.VocabType.Interjection,
+    }
+
+    def __init__(self, vocab_reader: VocabReader):
+        vocab_data = vocab_reader.vocab_data
+
+        self.length = len(vocab_data)
+        self.markers: set[vocab.VocabType] = set()
+
+        # Shape of the first data chunk (the principal parts or nom. and gen. sg.)
+        self.first_is_latin = False
+        self.first_parts: list[str] = []
+
+        # Genders in the second data chunk
+        self.second_genders: tuple[vocab.Gender,...] | None = None
+
+        for i, data_block in enumerate(vocab_data):
+            latin = vocab_reader.is_latin(data_block)
+
+            if i == 0 and latin:
+                self.first_is_latin = True
+                self.first_parts = [part.strip() for part in data_block[0].split(',')]
+            elif i == 1:
+                self.second_genders = vocab_reader.has_gender(data_block)
+
+            if not latin:
+                for marker in self.marker_regex.findall(data_block[0]):
+                    self.markers.add(self.marker_types[marker])
 
 
 class VocabReader:
-    def __init__(self, style: Style, html_tag: HTMLTag):
-        self.style = style
+    def __init__(self, html_tag: HTMLTag):
         self.html_tag = html_tag
         self.vocab_data = html_tag.flattened_data()
         self.vocab: vocab.Vocab|None = None
+        self.features: VocabFeatures|None = None
 
         self.debug_parsing_info = None
     
     def is_latin(self, data_block: tuple[str, HTMLTag]) -> bool:
-        for tag_class in data_block[1].get_attrs("class", ' '):
-            tag_class = '.' + tag_class
-            if tag_class not in self.style:
-                continue
-            if "font-weight" in self.style[tag_class] and self.style[tag_class]["font-weight"] == "700":
-                return True
-        return False
+        return StyleFlag.Bold in data_block[1].style_flags
 
     def is_definition(self, data_block: tuple[str, HTMLTag]) -> bool:
-        for tag_class in data_block[1].get_attrs("class", ' '):
-            tag_class = '.' + tag_class
-            if tag_class not in self.style:
-                continue
-            if "font-style" in self.style[tag_class] and self.style[tag_class]["font-style"] == "italic":
-                return True
-        return False
+        return StyleFlag.Italic in data_block[1].style_flags
     
     def has_gender(self, data_block: tuple[str, HTMLTag]) -> tuple[vocab.Gender,...] | None:
         genders = []
@@ -400,14 +593,20 @@ class VocabReader:
 
         return (-1,-1)
     
+    def get_features(self) -> VocabFeatures:
+        """
+        Returns the `VocabFeatures` of `self.vocab_data`, scanning it on the first call only
+        """
+        if self.features is None:
+            self.features = VocabFeatures(self)
+        return self.features
+
     def is_verb(self) -> bool:
-        if len(self.vocab_data) == 0:
-            return False
-        
-        if not self.is_latin(self.vocab_data[0]):
+        features = self.get_features()
+        if not features.first_is_latin:
             return False
 
-        principal_parts = [part.strip() for part in self.vocab_data[0][0].split(',')]
+        principal_parts = features.first_parts
         if len(principal_parts) in (2,3,4,):
             if len(principal_parts[1]) >= 2 and principal_parts[1][-2:] == "re":
                 return True
@@ -417,17 +616,17 @@ class VocabReader:
         return False
 
     def is_adverb(self) -> bool:
-        return self.find_in_data("adv.", word=True, latin=False) != (-1,-1,)
+        return vocab.VocabType.Adverb in self.get_features().markers
 
     def is_noun(self) -> bool:
-        if len(self.vocab_data) < 3:
+        features = self.get_features()
+        if features.length < 3:
             return False
         
-        if self.is_latin(self.vocab_data[0]):
-            nom_gen = self.vocab_data[0][0].split(',')
-            if len(nom_gen) != 2: return False
+        if features.first_is_latin:
+            if len(features.first_parts) != 2: return False
 
-            if (gender := self.has_gender(self.vocab_data[1])) is not None and len(gender) == 1:
+            if (gender := features.second_genders) is not None and len(gender) == 1:
                 return True
 
         return False
@@ -437,16 +636,16 @@ class VocabReader:
         return False
 
     def is_pronoun(self) -> bool:
-        return self.find_in_data("pron.", word=True, latin=False) != (-1,-1,)
+        return vocab.VocabType.Pronoun in self.get_features().markers
 
     def is_preoposition(self) -> bool:
-        return self.find_in_data("prep.", word=True, latin=False) != (-1,-1,)
+        return vocab.VocabType.Preposition in self.get_features().markers
 
     def is_conjunction(self) -> bool:
-        return self.find_in_data("conj.", word=True, latin=False) != (-1,-1,)
+        return vocab.VocabType.Conjunction in self.get_features().markers
 
     def is_interjection(self) -> bool:
-        return self.find_in_data("interj.", word=True, latin=False) != (-1,-1,)
+        return vocab.VocabType.Interjection in self.get_features().markers
 
     def determine_vocab_type(self):
         funcs = [
@@ -490,9 +689,8 @@ class VocabReader:
             if (i,j,) != (-1,-1,):
                 if "sg." in self.vocab_data[i][0][j:]:
                     if self.is_latin(self.vocab_data[i+1]):
-                        verb.special_cases[(
-                            (vocab.Mood.__name__, vocab.Mood.Imperative.name,),
-                            (vocab.Number.__name__, vocab.Number.Singular.name),
+                        verb.special_cases[vocab.Verb.special_case_key(
+                            vocab.Mood.Imperative, vocab.Number.Singular,
                         )] = self.vocab_data[i+1][0].strip()
                     else:
                         logging.warning(f"Irregular case unhandled: {self.debug_parsing_info}")
@@ -590,7 +788,7 @@ class VocabReader:
         if self.vocab is None:
             self.vocab = vocab.Vocab()
             
-        self.vocab.description = self.debug_parsing_info
+        self.vocab.parsed_description = vocab.parse_description(self.debug_parsing_info)
 
         try:
             self.vocab.load()
@@ -600,25 +798,312 @@ class VocabReader:
         return self.vocab
 
 
-def get_parsed_vocab() -> dict[str,list[vocab.Vocab]]:
+VOCAB_CACHE_VERSION = 1
+"""
+Bump whenever the layout of the cached `Vocab` objects changes in a way the source hash can't see
+"""
+
+VOCAB_CACHE_SUFFIX = ".vocabcache"
+
+
+def _vocab_cache_hasher():
+    """
+    Returns a sha256 hasher fed with everything but the dictionary itself, see `_vocab_cache_key`
+    """
+    hasher = hashlib.sha256()
+    hasher.update(str(VOCAB_CACHE_VERSION).encode())
+    for module_path in (__file__, vocab.__file__):
+        with open(module_path, 'rb') as f:
+            hasher.update(f.read())
+    return hasher
+
+
+def _vocab_cache_key(html_chunks: Iterable[str]) -> str:
+    """
+    Returns a key identifying the dictionary made of `html_chunks` as parsed by the current parser
+    code. Any change to the dictionary, `loader.py`, `vocab.py` or `VOCAB_CACHE_VERSION` results
+    in a different key, however the dictionary is split in chunks
+    """
+    hasher = _vocab_cache_hasher()
+    for chunk in html_chunks:
+        hasher.update(chunk.encode())
+    return hasher.hexdigest()
+
+
+def load_vocab_cache(cache_path: str, key: str) -> dict[str,list[vocab.Vocab]] | None:
+    """
+    Returns the vocab stored in `cache_path` if it was compiled with the key `key`.
+    Returns `None` if the cache is missing, stale or unreadable
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, parsed_vocab = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable vocab cache {cache_path}: {e}")
+        return None
+
+    if cached_key != key:
+        return None
+    return parsed_vocab
+
+
+def save_vocab_cache(cache_path: str, key: str, parsed_vocab: dict[str,list[vocab.Vocab]]):
+    """
+    Writes `parsed_vocab` to `cache_path`. The file is replaced atomically so a crash
+    never leaves a half written cache behind, and each writer has a temporary file of its own so
+    that processes saving at the same time never write into each other's
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_path)), prefix=os.path.basename(cache_path), suffix=".tmp")
+    except OSError as e:
+        logging.warning(f"Could not write vocab cache {cache_path}: {e}")
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((key, parsed_vocab,), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        os.unlink(tmp_path)
+        logging.warning(f"Could not write vocab cache {cache_path}: {e}")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+STREAM_CHUNK_SIZE = 1 << 14
+
+
+def iter_parsed_vocab(html_chunks: Iterable[str]) -> Iterator[tuple[str, vocab.Vocab|None]]:
+    """
+    Parses the dictionary fed in pieces by `html_chunks` and yields `(header name, None)` for
+    every header and `(header name, vocab)` for every vocab entry as soon as it has been read
+    """
+    parser = StreamingVocabParser()
+    for chunk in html_chunks:
+        parser.feed(chunk)
+        yield from parser.pop_parsed()
+    parser.close()
+    yield from parser.pop_parsed()
+
+
+def read_html_chunks(path: str) -> Iterator[str]:
+    """
+    Reads the dictionary at `path` `STREAM_CHUNK_SIZE` characters at a time
+    """
+    with open(path, 'r') as f:
+        yield from iter(lambda: f.read(STREAM_CHUNK_SIZE), '')
+
+
+def stream_parsed_vocab(path: str = "LatinDictionary.html") -> Iterator[tuple[str, vocab.Vocab|None]]:
+    """
+    `iter_parsed_vocab` over the dictionary at `path`, never holding more than a chunk of it in memory
+    """
+    return iter_parsed_vocab(read_html_chunks(path))
+
+
+def parse_vocab_html(html: str) -> dict[str,list[vocab.Vocab]]:
+    """
+    Parses the dictionary `html` into a dict from header to the vocab under it
+    """
+    return collect_vocab(iter_parsed_vocab(
+        html[i:i+STREAM_CHUNK_SIZE] for i in range(0, len(html), STREAM_CHUNK_SIZE)))
+
+
+# Start of the headers a dictionary may be split at, see `split_html_sections`
+header_start_regex = re.compile(r"<h[12][\s>]")
+
+
+def split_html_sections(html: str, count: int) -> list[str]:
+    """
+    Splits `html` at h1/h2 headers into at most `count` documents of similar size that can be
+    parsed independently. Every section after the first is prefixed with everything before the
+    first header so it still has the stylesheet and the tags enclosing the vocab
+    """
+    starts = [match.start() for match in header_start_regex.finditer(html)]
+    if count <= 1 or len(starts) <= 1:
+        return [html]
+
+    prefix = html[:starts[0]]
+    target_size = (len(html) - starts[0]) / count
+
+    sections = []
+    section_start = starts[0]
+    for start in starts[1:]:
+        if start - section_start >= target_size:
+            sections.append(html[section_start:start])
+            section_start = start
+    sections.append(html[section_start:])
+
+    return [prefix + section for section in sections]
+
+
+def read_html_section(html: str) -> list[tuple[str, vocab.Vocab|None]]:
+    """
+    Parses a whole section from `split_html_sections`. Runs in the worker processes of `load_vocab_sources`
+    """
+    return list(iter_parsed_vocab([html]))
+
+
+def load_vocab_sources(paths: list[str], processes: int|None = None, use_cache: bool = True) -> dict[str,list[vocab.Vocab]]:
+    """
+    Parses every dictionary in `paths` and merges them into one dict from header to vocab.
+    Headers keep the order of `paths` and vocab under a header found in several files are appended
+    in that order too, so the result doesn't depend on how the work was scheduled
+
+    Dictionaries without an up to date cache (see `get_parsed_vocab`) are split with
+    `split_html_sections` and parsed in a pool of `processes` processes (`os.cpu_count()` if `None`).
+    `processes=1` parses everything in this process
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    # `(path, html, cache key)` of the dictionaries that need parsing
+    to_parse: list[tuple[str, str, str]] = []
+    parsed_sources: dict[str, dict[str,list[vocab.Vocab]]] = {}
+
+    for path in paths:
+        with open(path, 'r') as f:
+            html = f.read()
+
+        key = _vocab_cache_key([html])
+        if use_cache and (parsed_vocab := load_vocab_cache(path + VOCAB_CACHE_SUFFIX, key)) is not None:
+            parsed_sources[path] = parsed_vocab
+        else:
+            to_parse.append((path, html, key,))
+
+    sections: list[str] = []
+    section_owners: list[str] = []
+    for path, html, _ in to_parse:
+        for section in split_html_sections(html, processes):
+            sections.append(section)
+            section_owners.append(path)
+
+    if processes == 1 or len(sections) <= 1:
+        parsed_sections = [read_html_section(section) for section in sections]
+    else:
+        with ProcessPoolExecutor(min(processes, len(sections))) as executor:
+            parsed_sections = list(executor.map(read_html_section, sections))
+
+    blocks: dict[str, list[tuple[str, vocab.Vocab|None]]] = {path: [] for path, _, _ in to_parse}
+    for path, parsed_section in zip(section_owners, parsed_sections):
+        blocks[path] += parsed_section
+
+    for path, _, key in to_parse:
+        parsed_sources[path] = collect_vocab(blocks[path])
+        if use_cache:
+            save_vocab_cache(path + VOCAB_CACHE_SUFFIX, key, parsed_sources[path])
+
+    if len(paths) == 1:
+        return parsed_sources[paths[0]]
+
+    resulting_vocab = {}
+    for path in paths:
+        for header_name, vocab_list in parsed_sources[path].items():
+            resulting_vocab.setdefault(header_name, []).extend(vocab_list)
+    return resulting_vocab
+
+
+def get_parsed_vocab(path: str = "LatinDictionary.html", use_cache: bool = True) -> dict[str,list[vocab.Vocab]]:
     """
     For quickstarting projects; gives a list of latin vocab 
+
+    If `use_cache` is `True` the parsed vocab is stored next to `path` (with `VOCAB_CACHE_SUFFIX`
+    appended) and reused on later calls until the dictionary or the parser code changes
+
+    The dictionary is streamed (see `stream_parsed_vocab`) rather than read whole. Use
+    `load_vocab_sources` to load several dictionaries or to parse a large one in parallel
     """
+    if not use_cache:
+        return collect_vocab(stream_parsed_vocab(path))
 
-    parsed_html: HTMLTag|None = None
+    cache_path = path + VOCAB_CACHE_SUFFIX
+    if (parsed_vocab := load_vocab_cache(cache_path, _vocab_cache_key(read_html_chunks(path)))) is not None:
+        return parsed_vocab
 
-    with open("LatinDictionary.html", 'r') as f:
-        parser = MyHTMLParser()
-        parser.feed(f.readline())
-        parser.close()
-        parsed_html = parser.root
-    
-    html_reader = HTMLReader(parsed_html)
-    return html_reader.read_html()
+    # Hashed again as it is parsed, so the cache is keyed by what was actually read
+    hasher = _vocab_cache_hasher()
+    def read_hashed_chunks() -> Iterator[str]:
+        for chunk in read_html_chunks(path):
+            hasher.update(chunk.encode())
+            yield chunk
+
+    parsed_vocab = collect_vocab(iter_parsed_vocab(read_hashed_chunks()))
+    save_vocab_cache(cache_path, hasher.hexdigest(), parsed_vocab)
+    return parsed_vocab
+
+
+COMPILED_VOCAB_SUFFIX = ".vocabdict"
+
+
+def _compiled_vocab_sources(path: str) -> list[str]:
+    """
+    Returns the files a compiled dictionary of `path` depends on
+    """
+    return [path, __file__, vocab.__file__, compiled.__file__]
+
+
+def _compiled_vocab_stats(path: str) -> tuple[int, ...]:
+    """
+    Returns the `(size, mtime)` of every source of a compiled dictionary of `path`. Cheap compared
+    to `_compiled_vocab_key`, which reads them all
+    """
+    stats = []
+    for source in _compiled_vocab_sources(path):
+        stat = os.stat(source)
+        stats += [stat.st_size, stat.st_mtime_ns]
+    return tuple(stats)
+
+
+def _compiled_vocab_key(path: str) -> str:
+    """
+    `_vocab_cache_key` of the dictionary at `path` that also covers `compiled.py`, where the compiled layout is
+    """
+    hasher = hashlib.sha256(_vocab_cache_key(read_html_chunks(path)).encode())
+    with open(compiled.__file__, 'rb') as f:
+        hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def get_compiled_vocab(path: str = "LatinDictionary.html") -> compiled.CompiledDictionary:
+    """
+    Returns the dictionary at `path` compiled (see `compiled.py`) and mapped into memory. The
+    compiled file is stored next to `path` (with `COMPILED_VOCAB_SUFFIX` appended) and compiled
+    again from `get_parsed_vocab` once the dictionary or the parser code changes
+
+    Freshness is checked from the size and mtime of the sources; they are only read and hashed
+    (see `_compiled_vocab_key`) when those changed. Every process opening the file shares one copy
+    of the vocab, so prefer this over `get_parsed_vocab` for read-only use
+    """
+    compiled_path = path + COMPILED_VOCAB_SUFFIX
+    source_stats = _compiled_vocab_stats(path)
+    key = None
+
+    try:
+        dictionary = compiled.CompiledDictionary(compiled_path)
+        if dictionary.source_stats == source_stats:
+            return dictionary
+
+        key = _compiled_vocab_key(path)
+        if dictionary.key == key:
+            # Touched but unchanged
+            compiled.set_source_stats(compiled_path, source_stats)
+            return dictionary
+        dictionary.close()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable compiled dictionary {compiled_path}: {e}")
+
+    if key is None:
+        key = _compiled_vocab_key(path)
+    compiled.write_compiled_vocab(compiled_path, key, source_stats, get_parsed_vocab(path))
+    return compiled.CompiledDictionary(compiled_path)
 
 
 def main():
-    parsed_vocab = get_parsed_vocab()
+    parsed_vocab = get_compiled_vocab().get_vocab()
 
     import visualizer
     vis = visualizer.Visualizer()
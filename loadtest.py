@@ -0,0 +1,188 @@
+"""
+Load test of the Discord bot without Discord: simulated students talk to `MyClient` through fake
+channels in the same process
+
+    python loadtest.py --students 1000 --rounds 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import discord
+
+from discord_integration import MyClient, SendQueue, Teacher
+
+
+class FakeUser:
+    def __init__(self, user_id:int):
+        self.id = user_id
+        self.name = f"student{user_id}"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeMessage:
+    def __init__(self, message_id:int, content:str, author, channel:FakeDMChannel):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.reactions:list[str] = []
+
+    async def add_reaction(self, emoji:str):
+        await asyncio.sleep(self.channel.latency)
+        self.reactions.append(emoji)
+
+
+class FakeReaction:
+    def __init__(self, emoji:str, message:FakeMessage):
+        self.emoji = emoji
+        self.message = message
+
+
+class FakeDMChannel(discord.DMChannel):
+    """
+    Direct message channel whose `send` takes `latency` seconds and wakes the student waiting for a reply
+    """
+    message_ids = 0
+
+    def __init__(self, channel_id:int, latency:float):
+        # `discord.DMChannel.__init__` needs a connection state
+        self.id = channel_id
+        self.latency = latency
+        self.received:asyncio.Queue[FakeMessage] = asyncio.Queue()
+
+    def make_message(self, content:str, author) -> FakeMessage:
+        FakeDMChannel.message_ids += 1
+        return FakeMessage(FakeDMChannel.message_ids, content, author, self)
+
+    async def send(self, content:str) -> FakeMessage:
+        await asyncio.sleep(self.latency)
+        message = self.make_message(content, None)
+        self.received.put_nowait(message)
+        return message
+
+
+class LoadTest:
+    reply_timeout = 30
+
+    def __init__(self, students:int, rounds:int, latency:float, think_time:float, max_teachers:int|None = None):
+        self.students = students
+        self.rounds = rounds
+        self.latency = latency
+        self.think_time = think_time
+        self.max_teachers = max_teachers
+
+        self.latencies:list[float] = []
+        self.unanswered = 0
+        self.loop_lags:list[float] = []
+        self.client:MyClient|None = None
+
+    async def dispatch(self, message:FakeMessage) -> FakeMessage|None:
+        """
+        Hands `message` to the bot like discord.py does (in a task of its own) and returns the reply,
+        or `None` if there was none within `reply_timeout` seconds
+        """
+        channel:FakeDMChannel = message.channel
+        while not channel.received.empty():
+            channel.received.get_nowait()
+
+        start = time.perf_counter()
+        asyncio.create_task(self.client.on_message(message))
+        try:
+            reply = await asyncio.wait_for(channel.received.get(), self.reply_timeout)
+        except asyncio.TimeoutError:
+            self.unanswered += 1
+            return None
+        self.latencies.append(time.perf_counter() - start)
+        return reply
+
+    async def student(self, user_id:int):
+        user = FakeUser(user_id)
+        channel = FakeDMChannel(user_id, self.latency)
+
+        await self.dispatch(channel.make_message(".start", user))
+        for _ in range(self.rounds):
+            await asyncio.sleep(random.uniform(0, 2 * self.think_time))
+            reply = await self.dispatch(channel.make_message("answer", user))
+            if reply is None:
+                continue
+
+            emoji = random.choice((Teacher.correct_emoji, Teacher.wrong_emoji,))
+            asyncio.create_task(self.client.on_reaction_add(FakeReaction(emoji, reply), user))
+
+        await self.dispatch(channel.make_message(".stop", user))
+
+    async def monitor_loop_lag(self, interval:float = 0.01):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lags.append(time.perf_counter() - start - interval)
+
+    async def run(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            self.client = MyClient(store_path=os.path.join(store_dir, "progress.sqlite3"), max_teachers=self.max_teachers)
+            await self.client.on_ready()
+            await self.client.loaded.wait()
+
+            tracemalloc.start()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            monitor = asyncio.create_task(self.monitor_loop_lag())
+
+            start = time.perf_counter()
+            await asyncio.gather(*(self.student(user_id) for user_id in range(self.students)))
+            duration = time.perf_counter() - start
+
+            monitor.cancel()
+            memory = tracemalloc.get_traced_memory()[0] - memory_before
+            tracemalloc.stop()
+            print(f"{len(self.client.teachers)} sessions in memory")
+
+            await self.client.close()
+
+        self.report(duration, memory)
+
+    def report(self, duration:float, memory:int):
+        # Inclusive, as the default exclusive method extrapolates p99 beyond the largest sample
+        quantiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        lag_quantiles = (statistics.quantiles(self.loop_lags, n=100, method="inclusive")
+            if len(self.loop_lags) >= 2 else [0] * 99)
+        print(f"{self.students} students, {len(self.latencies)} messages in {duration:.2f}s "
+            f"({len(self.latencies) / duration:.0f} msg/s), {self.unanswered} unanswered")
+        print(f"Response latency: p50 {quantiles[49]*1000:.1f} ms, p99 {quantiles[98]*1000:.1f} ms, "
+            f"max {max(self.latencies)*1000:.1f} ms")
+        print(f"Event loop lag: p50 {lag_quantiles[49]*1000:.1f} ms, p99 {lag_quantiles[98]*1000:.1f} ms, "
+            f"max {max(self.loop_lags, default=0)*1000:.1f} ms")
+        print(f"Memory: {memory / 1024:.0f} KiB, {memory / self.students / 1024:.1f} KiB per session")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10, help="answers per student")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds each fake Discord request takes")
+    parser.add_argument("--think-time", type=float, default=0.05, help="mean seconds a student waits before answering")
+    parser.add_argument("--unpaced", action="store_true", help="don't pace sends to Discord's rate limits")
+    parser.add_argument("--max-teachers", type=int, default=MyClient.max_teachers, help="sessions kept in memory")
+    args = parser.parse_args()
+
+    if args.unpaced:
+        SendQueue.message_rate = SendQueue.reaction_rate = 1e9
+        SendQueue.message_burst = SendQueue.reaction_burst = 1e9
+
+    asyncio.run(LoadTest(args.students, args.rounds, args.latency, args.think_time, args.max_teachers).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import heapq
+import math
+import random
+import time
+from typing import Hashable, Iterable, Sequence
+
+
+class Card:
+    """
+    SM-2 review state of one question
+    """
+    __slots__ = ("key", "easiness", "interval", "repetitions", "due", "version")
+
+    def __init__(self, key: Hashable, due: float):
+        self.key = key
+        self.easiness = 2.5
+        self.interval = 0.0
+        self.repetitions = 0
+        self.due = due
+        # Bumped on every review so older heap entries of this card can be recognised as stale
+        self.version = 0
+
+
+class Scheduler:
+    """
+    SM-2 style spaced repetition over a set of questions identified by hashable keys
+
+    Reviewed cards are kept in a heap ordered by due time. `next_card` serves the most overdue card,
+    otherwise a card never asked before (in random order), otherwise the card due the soonest
+
+    `keys` is only referenced, never copied, so it can be shared by every scheduler (eg. the tuples
+    of a `discord_integration.StudyIndex`); a scheduler only holds the cards it has served or reviewed.
+    New cards are drawn in the order of a random permutation `i -> (offset + step * i) % len(keys)`
+    picked from `seed`
+    """
+
+    interval_unit = 24 * 60 * 60
+    """
+    Length of the SM-2 intervals in seconds
+    """
+    relearn_delay = 60
+    """
+    Seconds until a failed card is due again
+    """
+    pass_quality = 3
+
+    def __init__(self, keys: Sequence[Hashable], seed: int|str|None = None):
+        self.cards: dict[Hashable, Card] = {}
+        self.due_heap: list[tuple[float, int, int, Hashable]] = []
+        self.push_count = 0
+
+        self.keys = keys
+        rng = random.Random(seed)
+        self.new_offset = rng.randrange(len(keys)) if len(keys) > 0 else 0
+        self.new_step = 1
+        if len(keys) > 2:
+            self.new_step = rng.randrange(1, len(keys))
+            while math.gcd(self.new_step, len(keys)) != 1:
+                self.new_step = rng.randrange(1, len(keys))
+        # Number of keys of the permutation drawn so far
+        self.new_drawn = 0
+
+    def add_cards(self, cards: Iterable[Card]):
+        """
+        Restores previously reviewed cards (eg. loaded from a `storage.ProgressStore`)
+        """
+        for card in cards:
+            self.cards[card.key] = card
+            self.push(card)
+
+    def push(self, card: Card):
+        self.push_count += 1
+        heapq.heappush(self.due_heap, (card.due, self.push_count, card.version, card.key,))
+
+    def pop_new_key(self) -> Hashable|None:
+        """
+        Returns the next key of the permutation that has no card yet, or `None` once all have one
+        """
+        while self.new_drawn < len(self.keys):
+            key = self.keys[(self.new_offset + self.new_step * self.new_drawn) % len(self.keys)]
+            self.new_drawn += 1
+            if key not in self.cards:
+                return key
+        return None
+
+    def peek_due(self) -> Card|None:
+        """
+        Returns the reviewed card due the soonest, dropping stale heap entries
+        """
+        while len(self.due_heap) > 0:
+            due, _, version, key = self.due_heap[0]
+            card = self.cards[key]
+            if card.version == version:
+                return card
+            heapq.heappop(self.due_heap)
+        return None
+
+    def next_card(self, now: float|None = None) -> Hashable|None:
+        """
+        Returns the key of the question to ask next, or `None` if there are no cards
+
+        The card is put back `relearn_delay` seconds later so an unanswered card isn't asked again
+        right away; `review` reschedules it properly
+        """
+        if now is None:
+            now = time.time()
+
+        card = self.peek_due()
+        if (card is None or card.due > now) and (key := self.pop_new_key()) is not None:
+            card = self.cards[key] = Card(key, now)
+
+        if card is None:
+            return None
+
+        card.due = max(card.due, now) + self.relearn_delay
+        card.version += 1
+        self.push(card)
+        return card.key
+
+    def review(self, key: Hashable, quality: int, now: float|None = None):
+        """
+        Records an answer to the card `key` graded `quality` from 0 (blackout) to 5 (perfect)
+        and reschedules it
+        """
+        if now is None:
+            now = time.time()
+
+        if (card := self.cards.get(key)) is None:
+            card = self.cards[key] = Card(key, now)
+
+        if quality < self.pass_quality:
+            card.repetitions = 0
+            card.interval = 0.0
+            card.due = now + self.relearn_delay
+        else:
+            card.repetitions += 1
+            match card.repetitions:
+                case 1:
+                    card.interval = 1.0
+                case 2:
+                    card.interval = 6.0
+                case _:
+                    card.interval *= card.easiness
+            card.due = now + card.interval * self.interval_unit
+
+        card.easiness = max(1.3, card.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        card.version += 1
+        self.push(card)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import string
+from typing import Iterable, Callable
+
+from vocab import Vocab, DescBlockType, make_short
+
+
+class SearchCancelled(Exception):
+    """
+    Raised by `SearchIndex.search` when its `is_cancelled` callback returns `True`
+    """
+
+
+def find_match(desc: str, to_match: str, word_match: str = "Off") -> bool:
+    """
+    Returns whether `to_match` is in `desc`
+
+    `word_match` is one of `"Off"`, `"Word"`, `"Word Beginning"` and `"Word Ending"`. Unless it is `"Off"`
+    the match must not be preceded and/or followed by an ascii letter
+    """
+    i = desc.find(to_match)
+    while i != -1:
+        match word_match:
+            case "Word":
+                if (i >= 1 and desc[i-1] in string.ascii_letters) or \
+                        (i < len(desc) - len(to_match) and desc[i+len(to_match)] in string.ascii_letters):
+                    i = desc.find(to_match, i+1)
+                    continue
+            case "Word Beginning":
+                if i >= 1 and desc[i-1] in string.ascii_letters:
+                    i = desc.find(to_match, i+1)
+                    continue
+            case "Word Ending":
+                if i < len(desc) - len(to_match) and desc[i+len(to_match)] in string.ascii_letters:
+                    i = desc.find(to_match, i+1)
+                    continue
+
+        return True
+    return False
+
+
+class SearchIndex:
+    """
+    N-gram index over the text of every vocab, used to find which vocab a text filter matches
+    without scanning every description
+
+    Each text type (`"Any"`, `"Latin"`, `"Definition"` and `"Parsings"`) is indexed separately for
+    every combination of case and diacritic matching, the first time that combination is searched
+    """
+
+    gram_size = 3
+    cancel_check_interval = 64
+
+    def __init__(self, vocab_list: Iterable[Vocab]):
+        self.vocab: list[Vocab] = list(vocab_list)
+
+        # `(text type, match case, match diacritics)` to the normalised texts of each vocab
+        # (by index in `self.vocab`) and the indexes of the vocab containing each n-gram
+        self.fields: dict[tuple[str, bool, bool], tuple[list[list[str]], dict[str, set[int]]]] = {}
+
+    @staticmethod
+    def get_texts(vocab: Vocab, text_type: str) -> list[str]:
+        match text_type:
+            case "Latin":
+                return [d for (d,dt) in vocab.get_parsed_description() if dt == DescBlockType.Latin]
+            case "Definition":
+                return [d for (d,dt) in vocab.get_parsed_description() if dt == DescBlockType.Definition]
+            case "Parsings":
+                return [vocab.get_extended_description()]
+            case _:
+                return [vocab.get_clean_description()]
+
+    @staticmethod
+    def normalize(text: str, match_case: bool, match_diacritics: bool) -> str:
+        if not match_case:
+            text = text.lower()
+        if not match_diacritics:
+            text = make_short(text)
+        return text
+
+    def get_field(self, text_type: str, match_case: bool, match_diacritics: bool) -> tuple[list[list[str]], dict[str, set[int]]]:
+        key = (text_type, match_case, match_diacritics,)
+        if (field := self.fields.get(key)) is not None:
+            return field
+
+        texts: list[list[str]] = []
+        grams: dict[str, set[int]] = {}
+        for i, vocab in enumerate(self.vocab):
+            vocab_texts = [self.normalize(text, match_case, match_diacritics) for text in self.get_texts(vocab, text_type)]
+            texts.append(vocab_texts)
+
+            for text in vocab_texts:
+                for n in range(1, self.gram_size + 1):
+                    for j in range(len(text) - n + 1):
+                        grams.setdefault(text[j:j+n], set()).add(i)
+
+        field = self.fields[key] = (texts, grams,)
+        return field
+
+    def get_candidates(self, field: tuple[list[list[str]], dict[str, set[int]]], to_match: str) -> set[int]|list[int]:
+        """
+        Returns the indexes of the vocab in `field` that contain every n-gram of `to_match`
+        """
+        texts, grams = field
+        if to_match == "":
+            return [i for i, vocab_texts in enumerate(texts) if len(vocab_texts) > 0]
+
+        n = min(len(to_match), self.gram_size)
+        postings = sorted((grams.get(to_match[j:j+n], set()) for j in range(len(to_match) - n + 1)), key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def search(self, to_match: str, text_type: str = "Any", search_parsings: bool = False,
+            match_case: bool = False, match_diacritics: bool = False, word_match: str = "Off",
+            within: set[Vocab]|None = None, is_cancelled: Callable[[], bool]|None = None) -> set[Vocab]:
+        """
+        Returns the vocab matching a `visualizer.TextFilter` with these settings
+
+        If `within` is not `None` only the vocab in it are considered (eg. the matches of a
+        shorter query that can only have more matches, see `visualizer.TextFilter.narrows`)
+
+        `is_cancelled` is polled while checking candidates; `SearchCancelled` is raised once it returns `True`
+        """
+        to_match = self.normalize(to_match, match_case, match_diacritics)
+
+        text_types = [text_type]
+        if search_parsings:
+            text_types.append("Parsings")
+
+        matches: set[int] = set()
+        for text_type in text_types:
+            field = self.get_field(text_type, match_case, match_diacritics)
+            texts = field[0]
+            for checked, i in enumerate(self.get_candidates(field, to_match)):
+                if is_cancelled is not None and checked % self.cancel_check_interval == 0 and is_cancelled():
+                    raise SearchCancelled()
+                if within is not None and self.vocab[i] not in within:
+                    continue
+                if i not in matches and any(find_match(text, to_match, word_match) for text in texts[i]):
+                    matches.add(i)
+
+        return {self.vocab[i] for i in matches}
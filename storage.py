@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from scheduler import Card
+
+
+class ProgressStore:
+    """
+    SQLite store of every student's session state, SM-2 cards and review history
+
+    Sessions also hold the state of an evicted `discord_integration.Teacher` that isn't written
+    through as it changes (see `Teacher.spill`), as an opaque JSON string
+
+    Rows are keyed by student alone. When several bot processes share the store each student is
+    owned by one of them (see `discord_integration.MyClient.owner_shard`), the only one reading
+    and writing their rows
+
+    Writes are queued and committed by a background thread, several at a time in one transaction,
+    so they never block the caller (eg. the bot's event loop). Reads block; run them in an executor
+    """
+
+    flush_interval = 0.5
+    """
+    Seconds the writer waits to gather more writes into a transaction
+    """
+
+    tables = {
+        "sessions": """
+            CREATE TABLE IF NOT EXISTS sessions (
+                student INTEGER PRIMARY KEY,
+                state INTEGER NOT NULL,
+                spilled TEXT
+            )""",
+        "cards": """
+            CREATE TABLE IF NOT EXISTS cards (
+                student INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                card TEXT NOT NULL,
+                easiness REAL NOT NULL,
+                interval REAL NOT NULL,
+                repetitions INTEGER NOT NULL,
+                due REAL NOT NULL,
+                PRIMARY KEY (student, mode, card)
+            )""",
+        "reviews": """
+            CREATE TABLE IF NOT EXISTS reviews (
+                student INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                card TEXT NOT NULL,
+                quality INTEGER NOT NULL,
+                time REAL NOT NULL
+            )""",
+    }
+
+    def __init__(self, path: str = "progress.sqlite3", create_schema: bool = True):
+        """
+        Unless `create_schema` is `False` the tables are created or migrated first (see `create_schema`)
+        """
+        self.path = path
+
+        if create_schema:
+            self.create_schema(path)
+
+        # `(sql, parameters)` to execute, a `threading.Event` to set once everything before it is
+        # committed, or `None` to stop the writer
+        self.pending: queue.SimpleQueue[tuple[str, tuple]|threading.Event|None] = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self.write_pending, daemon=True)
+        self.writer.start()
+
+    @classmethod
+    def create_schema(cls, path: str):
+        """
+        Creates the tables of the store at `path` and migrates the tables of older stores. Run it
+        once before starting several processes on the same store (see `discord_integration.main`)
+        """
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table, create in cls.tables.items():
+                    columns = [column[1] for column in connection.execute(f"PRAGMA table_info({table})")]
+                    if "shard" not in columns:
+                        connection.execute(create)
+                        continue
+
+                    # Stores that kept a copy of each student's rows per shard. The primary keys
+                    # change, so the tables are rebuilt with the rows of the lowest shard (where DMs went)
+                    connection.execute(f"ALTER TABLE {table} RENAME TO {table}_sharded")
+                    connection.execute(create)
+                    kept_columns = ", ".join(column for column in columns if column != "shard")
+                    connection.execute(f"INSERT OR IGNORE INTO {table} ({kept_columns}) "
+                        f"SELECT {kept_columns} FROM {table}_sharded ORDER BY shard, rowid")
+                    connection.execute(f"DROP TABLE {table}_sharded")
+
+                # Stores created before sessions could be spilled
+                if "spilled" not in [column[1] for column in connection.execute("PRAGMA table_info(sessions)")]:
+                    connection.execute("ALTER TABLE sessions ADD COLUMN spilled TEXT")
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.close()
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def write_pending(self):
+        connection = self.connect()
+        running = True
+        while running:
+            # Gathers writes for up to `flush_interval`, or until someone waits for them
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while isinstance(batch[-1], tuple):
+                try:
+                    batch.append(self.pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            # Waiters and the stop sentinel are picked out first, so a failed write can't lose them
+            writes = []
+            events = []
+            for item in batch:
+                match item:
+                    case None:
+                        running = False
+                    case threading.Event():
+                        events.append(item)
+                    case (sql, parameters):
+                        writes.append(item)
+
+            try:
+                with connection:
+                    for sql, parameters in writes:
+                        connection.execute(sql, parameters)
+            except sqlite3.Error as e:
+                logging.warning(f"Could not write {len(writes)} changes to {self.path}: {e}")
+            finally:
+                for event in events:
+                    event.set()
+        connection.close()
+
+    def save_session(self, student: int, state: int, spilled: str|None = None):
+        self.pending.put(("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (student, state, spilled,),))
+
+    def save_card(self, student: int, mode: str, card_key: str, card: Card):
+        self.pending.put(("INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (student, mode, card_key, card.easiness, card.interval, card.repetitions, card.due,),))
+
+    def add_review(self, student: int, mode: str, card_key: str, quality: int, review_time: float):
+        self.pending.put(("INSERT INTO reviews VALUES (?, ?, ?, ?, ?)", (student, mode, card_key, quality, review_time,),))
+
+    def flush(self):
+        """
+        Blocks until every write queued so far is committed
+        """
+        event = threading.Event()
+        self.pending.put(event)
+        event.wait()
+
+    def close(self):
+        """
+        Commits the queued writes and stops the writer. Blocks
+        """
+        self.pending.put(None)
+        self.writer.join()
+
+    def load_student(self, student: int) -> tuple[int|None, str|None, dict[str, list[Card]]]:
+        """
+        Returns the session state of `student` (`None` if never saved), what was spilled with it
+        and their cards by mode, keyed by the card keys they were saved with. Includes the writes
+        still queued. Blocks
+        """
+        self.flush()
+
+        connection = self.connect()
+        try:
+            row = connection.execute("SELECT state, spilled FROM sessions WHERE student = ?", (student,)).fetchone()
+            state, spilled = (None, None,) if row is None else row
+
+            cards: dict[str, list[Card]] = {}
+            for mode, card_key, easiness, interval, repetitions, due in connection.execute(
+                    "SELECT mode, card, easiness, interval, repetitions, due FROM cards WHERE student = ?", (student,)):
+                card = Card(card_key, due)
+                card.easiness = easiness
+                card.interval = interval
+                card.repetitions = repetitions
+                cards.setdefault(mode, []).append(card)
+        finally:
+            connection.close()
+
+        return state, spilled, cards
+
+    def get_reviews(self, student: int) -> list[tuple[Any, ...]]:
+        """
+        Returns the `(mode, card, quality, time)` of every review of `student`, oldest first. Blocks
+        """
+        self.flush()
+
+        connection = self.connect()
+        try:
+            return connection.execute(
+                "SELECT mode, card, quality, time FROM reviews WHERE student = ? ORDER BY rowid", (student,)).fetchall()
+        finally:
+            connection.close()
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+import pytest
+
+import loader
+
+
+DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), "LatinDictionary.html")
+
+
+def describe(parsed_vocab: dict) -> dict[str, list[str]]:
+    return {header: [vocab_word.get_clean_description() for vocab_word in vocab_list]
+        for header, vocab_list in parsed_vocab.items()}
+
+
+@pytest.fixture(scope="module")
+def html() -> str:
+    with open(DICTIONARY_PATH, 'r') as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def expected(html: str) -> dict[str, list[str]]:
+    return describe(loader.parse_vocab_html(html))
+
+
+@pytest.mark.parametrize("count", range(1, 17))
+def test_split_sections_parse_like_whole_document(html: str, expected: dict[str, list[str]], count: int):
+    blocks = []
+    for section in loader.split_html_sections(html, count):
+        blocks += loader.read_html_section(section)
+    parsed = describe(loader.collect_vocab(blocks))
+
+    assert list(parsed) == list(expected)
+    assert parsed == expected
+
+
+def test_streamed_load_parses_like_whole_document(tmp_path, expected: dict[str, list[str]]):
+    path = str(tmp_path / "LatinDictionary.html")
+    shutil.copyfile(DICTIONARY_PATH, path)
+
+    assert describe(loader.get_parsed_vocab(path, use_cache=False)) == expected
+    # Parsed and cached, then loaded from the cache
+    assert describe(loader.get_parsed_vocab(path)) == expected
+    assert os.path.exists(path + loader.VOCAB_CACHE_SUFFIX)
+    assert describe(loader.get_parsed_vocab(path)) == expected
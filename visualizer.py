@@ -1,16 +1,25 @@
 from __future__ import annotations
-import string
 
 from typing import Any, Callable
+import bisect
+import threading
+import time
 import dearpygui.dearpygui as dpg
 import dearpygui.demo as demo
 
 from vocab import *
+from search import SearchIndex, SearchCancelled
+from compiled import CompiledView
 
 
 class TextFilter:
     def __init__(self):
         self.table_row = None
+
+        # Settings, text and result of the last `get_visible_vocab`
+        self.cached_settings: tuple|None = None
+        self.cached_to_match: str|None = None
+        self.cached_vocab: set[Vocab]|None = None
     
     def __eq__(self, other: TextFilter):
         if not isinstance(other, TextFilter):
@@ -32,46 +41,151 @@ class TextFilter:
     def destroy(self):
         dpg.delete_item(self.table_row)
     
-    def should_be_visible(self, vocab:Vocab) -> bool:
-        match dpg.get_value(self.text_type_combo):
-            case "Latin":
-                descs = [d for (d,dt) in vocab.get_parsed_description() if dt == DescBlockType.Latin]
-            case "Definition":
-                descs = [d for (d,dt) in vocab.get_parsed_description() if dt == DescBlockType.Definition]
-            case _:
-                descs = [vocab.get_clean_description()]
-
-        if dpg.get_value(self.search_parsings_checkbox):
-            descs.append(vocab.get_extended_description())
-
-        to_match = dpg.get_value(self.text_input)
-
-        if not dpg.get_value(self.match_case_checkbox):
-            descs = [d.lower() for d in descs]
-            to_match = to_match.lower()
-        
-        if not dpg.get_value(self.match_diacritics_checkbox):
-            descs = [make_short(d) for d in descs]
-            to_match = make_short(to_match)
-
-        for desc in descs:
-            for i in range(len(desc) - len(to_match) + 1):
-                if desc[i:i+len(to_match)] == to_match:
-                    match dpg.get_value(self.word_match_combo):
-                        case "Word":
-                            if i >= 1 and desc[i-1] in string.ascii_letters:
-                                continue
-                            elif i < len(desc) - len(to_match) and desc[i+len(to_match)] in string.ascii_letters:
-                                continue
-                        case "Word Beginning":
-                            if i >= 1 and desc[i-1] in string.ascii_letters:
-                                continue
-                        case "Word Ending":
-                            if i < len(desc) - len(to_match) and desc[i+len(to_match)] in string.ascii_letters:
-                                continue
-
-                    return True
-        return False
+    @staticmethod
+    def narrows(old_to_match:str, to_match:str, word_match:str) -> bool:
+        """
+        Returns whether every match of `to_match` is also a match of `old_to_match`
+        """
+        match word_match:
+            case "Off":
+                return old_to_match in to_match
+            case "Word Beginning":
+                return to_match.startswith(old_to_match)
+            case "Word Ending":
+                return to_match.endswith(old_to_match)
+        return to_match == old_to_match
+
+    def get_settings(self) -> tuple:
+        """
+        Returns the text and settings of this filter. Must be called from the UI thread
+        """
+        return (
+            dpg.get_value(self.text_input),
+            dpg.get_value(self.text_type_combo),
+            dpg.get_value(self.search_parsings_checkbox),
+            dpg.get_value(self.match_case_checkbox),
+            dpg.get_value(self.match_diacritics_checkbox),
+            dpg.get_value(self.word_match_combo),
+        )
+
+    def get_visible_vocab(self, search_index:SearchIndex, get_inflection_index:Callable[[], InflectionIndex]|None = None,
+            filter_settings:tuple|None = None, is_cancelled:Callable[[], bool]|None = None) -> set[Vocab]:
+        """
+        Returns the vocab in `search_index` matching this filter. The result is cached and, when only
+        the text changed and it can only match less, refined from the previous result
+
+        `filter_settings` are from `get_settings` (read now if `None`). Raises `SearchCancelled`
+        if `is_cancelled` returns `True` before the search is done
+        """
+        if filter_settings is None:
+            filter_settings = self.get_settings()
+        to_match, *settings = filter_settings
+        text_type, search_parsings, match_case, match_diacritics, word_match = settings
+        settings = tuple(settings)
+
+        within = None
+        if self.cached_vocab is not None and settings == self.cached_settings:
+            if to_match == self.cached_to_match:
+                return self.cached_vocab
+            if self.narrows(self.cached_to_match, to_match, word_match):
+                within = self.cached_vocab
+
+        visible_vocab = search_index.search(
+            to_match,
+            text_type=text_type,
+            search_parsings=search_parsings,
+            match_case=match_case,
+            match_diacritics=match_diacritics,
+            word_match=word_match,
+            within=within,
+            is_cancelled=is_cancelled,
+        )
+
+        # A whole inflected form always matches its own parsings, whatever the word matching
+        if get_inflection_index is not None and search_parsings and not match_case and not match_diacritics:
+            visible_vocab.update(vocab for vocab, _ in get_inflection_index().lookup(to_match))
+
+        self.cached_settings = settings
+        self.cached_to_match = to_match
+        self.cached_vocab = visible_vocab
+        return visible_vocab
+
+
+class FilterWorker:
+    """
+    Evaluates the filters on a background thread so the UI keeps rendering while searching
+
+    Requests are debounced by `debounce_time` seconds and a new request cancels the one being
+    evaluated. Results are posted as a diff against the previously posted result, to be
+    applied on the UI thread with `pop_visibility_diff`
+    """
+
+    debounce_time = 0.1
+
+    def __init__(self, evaluate: Callable[[Any, Callable[[], bool]], set[Vocab]], visible_vocab: set[Vocab]):
+        """
+        `evaluate(request, is_cancelled)` returns the visible vocab for a request (see `submit`) and
+        may raise `SearchCancelled`. `visible_vocab` is what is currently shown
+        """
+        self.evaluate = evaluate
+        self.condition = threading.Condition()
+
+        self.request = None
+        self.request_time = 0.0
+        self.generation = 0
+
+        self.posted_visible_vocab = set(visible_vocab)
+        self.pending_hide: set[Vocab] = set()
+        self.pending_show: set[Vocab] = set()
+
+        self.thread = threading.Thread(target=self.run, name="FilterWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, request):
+        with self.condition:
+            self.generation += 1
+            self.request = request
+            self.request_time = time.monotonic()
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.request is None:
+                    self.condition.wait()
+                while (remaining := self.request_time + self.debounce_time - time.monotonic()) > 0:
+                    self.condition.wait(remaining)
+
+                request = self.request
+                generation = self.generation
+                self.request = None
+
+            try:
+                visible_vocab = self.evaluate(request, lambda: self.generation != generation)
+            except SearchCancelled:
+                continue
+
+            with self.condition:
+                if generation != self.generation:
+                    continue
+
+                hide = self.posted_visible_vocab - visible_vocab
+                show = visible_vocab - self.posted_visible_vocab
+                self.pending_hide = (self.pending_hide - show) | hide
+                self.pending_show = (self.pending_show - hide) | show
+                self.posted_visible_vocab = visible_vocab
+
+    def pop_visibility_diff(self) -> tuple[set[Vocab], set[Vocab], set[Vocab]] | None:
+        """
+        Returns `(to hide, to show, visible vocab)` posted since the last call, or `None` if nothing was posted
+        """
+        with self.condition:
+            if len(self.pending_hide) == 0 and len(self.pending_show) == 0:
+                return None
+            diff = (self.pending_hide, self.pending_show, self.posted_visible_vocab,)
+            self.pending_hide = set()
+            self.pending_show = set()
+            return diff
 
 
 class FilterMenu:
@@ -82,6 +196,9 @@ class FilterMenu:
         self.text_filter_group = None
         self.text_filters:list[TextFilter] = []
 
+        self.cached_vocab_types_active: tuple|None = None
+        self.type_visible_vocab: set[Vocab] = set()
+
         self.create()
     
     def remove_text_input_row(self, _s, _a, text_filter: TextFilter):
@@ -137,19 +254,248 @@ class FilterMenu:
             
             dpg.add_button(label="Add Row", width=-1, callback=self.create_text_input_row)
     
-    def should_be_visible(self, vocab:Vocab) -> bool:
-        if (active := self.vocab_types_active.get(type(vocab))) is not None:
-            if not active:
-                return False
+    def is_vocab_type_active(self, vocab:Vocab) -> bool:
+        if (active := self.vocab_types_active.get(vocab.vocab_type)) is not None:
+            return active
+        return self.vocab_types_active["Other"]
+
+    def get_filter_state(self) -> tuple:
+        """
+        Returns the state of every filter. Must be called from the UI thread; the state can then be
+        evaluated on any thread with `get_visible_vocab`
+        """
+        return (
+            tuple(self.vocab_types_active.items()),
+            [(filter, filter.get_settings(),) for filter in self.text_filters],
+        )
+
+    def get_visible_vocab(self, filter_state:tuple|None = None, is_cancelled:Callable[[], bool]|None = None) -> set[Vocab]:
+        """
+        Returns the vocab passing every filter. Each text filter row keeps its own result, so only
+        the rows that changed are searched again
+
+        `filter_state` is from `get_filter_state` (read now if `None`)
+        """
+        if filter_state is None:
+            filter_state = self.get_filter_state()
+        vocab_types_active, text_filters = filter_state
+
+        search_index = self.visualiser.get_search_index()
+
+        if vocab_types_active != self.cached_vocab_types_active:
+            active = dict(vocab_types_active)
+            self.cached_vocab_types_active = vocab_types_active
+            self.type_visible_vocab = {vocab for vocab in search_index.vocab
+                if active.get(vocab.vocab_type, active["Other"])}
+
+        filter_vocab = [
+            filter.get_visible_vocab(search_index, self.visualiser.get_inflection_index, filter_settings, is_cancelled)
+            for filter, filter_settings in text_filters]
+        filter_vocab.sort(key=len)
+
+        return self.type_visible_vocab.intersection(*filter_vocab)
+
+
+class VirtualVocabList:
+    """
+    The scrollable list of headers and vocab. Only the rows in or near the scrolled-to region have
+    DearPyGui items: a pool of row slots sits between two spacers standing in for the rows above
+    and below, and slots are rebound to other rows as the list scrolls. Rows under a closed header
+    don't exist at all
+
+    Row heights start as estimates and are replaced by their measured height once drawn
+    """
+
+    overscan = 8
+    info_groups_per_frame = 4
+    line_height = 23
+    item_spacing = 4
+    info_lines = {Verb: 17, Noun: 9}
+    """
+    Estimated number of lines of the info group of each vocab type (see `Visualizer.create_vocab_info_group`)
+    """
+
+    def __init__(self, visualiser: Visualizer):
+        self.visualiser = visualiser
+
+        self.window = None
+        self.top_spacer = None
+        self.bottom_spacer = None
+
+        # Pool of row slots, in the order they appear in `self.window`, and the row bound to each
+        self.slots: list[int] = []
+        self.slot_rows: list[tuple|None] = []
+        self.slot_headers: dict[int, int] = {}
+
+        self.header_open: dict[str, bool] = {}
+
+        # `("header", header text, open)` or `("vocab", vocab, expanded)`
+        self.rows: list[tuple] = []
+        # `offsets[i]` is the y position of `rows[i]`, `offsets[-1]` is the height of the whole list
+        self.offsets: list[float] = [0]
+        self.measured_heights: dict[tuple, float] = {}
+
+        self.rows_dirty = True
+        self.offsets_dirty = False
+        self.info_group_budget = self.info_groups_per_frame
+
+    def create(self):
+        for header_text in self.visualiser.vocab:
+            self.header_open[header_text] = True
+
+        with dpg.child_window(height=-1, horizontal_scrollbar=True) as self.window:
+            self.top_spacer = dpg.add_spacer(height=0)
+            self.bottom_spacer = dpg.add_spacer(height=0)
+
+    def invalidate(self):
+        """
+        Rebuilds the rows on the next `update`; call when headers, filters or expansions change
+        """
+        self.rows_dirty = True
+
+    def set_all_headers_open(self, is_open: bool):
+        for header_text in self.header_open:
+            self.header_open[header_text] = is_open
+        self.invalidate()
+
+    def row_height(self, row: tuple) -> float:
+        if (height := self.measured_heights.get(row)) is not None:
+            return height
+
+        kind, item, opened = row
+        if kind == "vocab" and opened:
+            return (self.line_height + self.item_spacing) * (1 + self.info_lines.get(item.vocab_type, 0))
+        return self.line_height + self.item_spacing
+
+    def build_rows(self):
+        rows = []
+        for header_text, vocab_list in self.visualiser.vocab.items():
+            is_open = self.header_open[header_text]
+            rows.append(("header", header_text, is_open,))
+            if not is_open:
+                continue
+
+            for vocab in vocab_list:
+                if vocab in self.visualiser.visible_vocab:
+                    rows.append(("vocab", vocab, self.visualiser.vocab_info[vocab]["expanded"],))
+
+        self.rows = rows
+        self.offsets_dirty = True
+
+    def build_offsets(self):
+        offsets = [0]
+        for row in self.rows:
+            offsets.append(offsets[-1] + self.row_height(row))
+        self.offsets = offsets
+        self.offsets_dirty = False
+
+    def poll_rows(self):
+        """
+        Records the drawn height of the bound rows and picks up headers opened/closed by the user
+        """
+        for slot, row in zip(self.slots, self.slot_rows):
+            if row is None:
+                continue
+
+            height = dpg.get_item_rect_size(slot)[1]
+            if height > 0 and self.measured_heights.get(row) != height + self.item_spacing:
+                self.measured_heights[row] = height + self.item_spacing
+                self.offsets_dirty = True
+
+            if row[0] == "header" and (is_open := dpg.get_value(self.slot_headers[slot])) != row[2]:
+                self.header_open[row[1]] = is_open
+                self.invalidate()
+
+    def create_row(self, row: tuple, slot: int) -> tuple:
+        """
+        Fills `slot` with `row` and returns the row it was bound to. Once `self.info_group_budget`
+        info groups were created this frame, expanded vocab are bound as a pending row without their
+        info group, and are bound again on a later frame
+        """
+        kind, item, opened = row
+        if kind == "vocab" and opened:
+            if self.info_group_budget <= 0:
+                self.visualiser.create_vocab_row(item, slot)
+                return ("pending", item, opened,)
+            self.info_group_budget -= 1
+
+        if kind == "header":
+            self.slot_headers[slot] = dpg.add_collapsing_header(label=item, default_open=opened, parent=slot)
         else:
-            if not self.vocab_types_active["Other"]:
-                return False
-        
-        for filter in self.text_filters:
-            if not filter.should_be_visible(vocab):
-                return False
-        
-        return True
+            self.slot_headers.pop(slot, None)
+            self.visualiser.create_vocab_row(item, slot)
+            if opened:
+                self.visualiser.create_vocab_info_group(item, slot)
+        return row
+
+    def bind(self, first: int, last: int):
+        """
+        Binds slots to `self.rows[first:last]`, reusing the slots already bound to one of those rows
+        """
+        rows = self.rows[first:last]
+        wanted = set(rows)
+
+        bound_slots = {}
+        free_slots = []
+        for slot, row in zip(self.slots, self.slot_rows):
+            if row in wanted:
+                bound_slots[row] = slot
+            else:
+                free_slots.append(slot)
+
+        while len(free_slots) + len(bound_slots) < len(rows):
+            free_slots.append(dpg.add_group(parent=self.window, before=self.bottom_spacer))
+
+        slots = []
+        slot_rows = []
+        for row in rows:
+            if (slot := bound_slots.get(row)) is None:
+                slot = free_slots.pop()
+                dpg.delete_item(slot, children_only=True)
+                row = self.create_row(row, slot)
+                dpg.show_item(slot)
+            slots.append(slot)
+            slot_rows.append(row)
+
+        for slot in free_slots:
+            dpg.delete_item(slot, children_only=True)
+            dpg.hide_item(slot)
+            slots.append(slot)
+            slot_rows.append(None)
+
+        if slots != self.slots:
+            for slot in slots:
+                dpg.move_item(slot, parent=self.window, before=self.bottom_spacer)
+
+        self.slots = slots
+        self.slot_rows = slot_rows
+
+    def update(self):
+        """
+        Rebinds the row slots to the scrolled-to region. Called every frame
+        """
+        self.poll_rows()
+
+        if self.rows_dirty:
+            self.build_rows()
+            self.rows_dirty = False
+        if self.offsets_dirty:
+            self.build_offsets()
+
+        scroll = dpg.get_y_scroll(self.window)
+        view_height = dpg.get_item_rect_size(self.window)[1]
+        if view_height <= 0:
+            view_height = 20 * self.line_height
+
+        first = max(bisect.bisect_right(self.offsets, scroll) - 1 - self.overscan, 0)
+        last = min(bisect.bisect_left(self.offsets, scroll + view_height) + self.overscan, len(self.rows))
+
+        self.info_group_budget = self.info_groups_per_frame
+        if self.slot_rows[:last-first] != self.rows[first:last] or any(row is not None for row in self.slot_rows[last-first:]):
+            self.bind(first, last)
+
+        dpg.configure_item(self.top_spacer, height=self.offsets[first])
+        dpg.configure_item(self.bottom_spacer, height=self.offsets[-1] - self.offsets[last])
 
 
 class Visualizer:
@@ -162,10 +508,77 @@ class Visualizer:
 
         self.vocab_window = None
         self.filter_menu = None
-        self.headers = []
+        self.vocab_list: VirtualVocabList|None = None
         self.vocab_info:dict[Vocab, dict[str, Any]] = {}
-        self.vocab_expansion_callback = []
+
+        self.inflection_index: InflectionIndex|None = None
+        self.search_index: SearchIndex|None = None
+        self.visible_vocab: set[Vocab] = set()
+        self.filter_worker: FilterWorker|None = None
+
+        self.progress_text = None
+        self.paradigm_progress: list[int] = [0, 0]
+        self.paradigm_generation = 0
     
+    def get_inflection_index(self) -> InflectionIndex:
+        """
+        Returns the `InflectionIndex` of `self.vocab`, building it on the first call
+        """
+        if self.inflection_index is None:
+            self.inflection_index = InflectionIndex(vocab for vocab_list in self.vocab.values() for vocab in vocab_list)
+        return self.inflection_index
+    
+    def get_search_index(self) -> SearchIndex:
+        """
+        Returns the `SearchIndex` of `self.vocab`, building it on the first call
+        """
+        if self.search_index is None:
+            self.search_index = SearchIndex(vocab for vocab_list in self.vocab.values() for vocab in vocab_list)
+        return self.search_index
+    
+    @staticmethod
+    def prepare_paradigm(vocab:Vocab):
+        match vocab:
+            case Verb():
+                vocab.conjugate()
+            case Noun():
+                vocab.cases
+
+    def prepare_paradigms(self, vocab_list:list[Vocab]):
+        """
+        Conjugates/declines `vocab_list` on a background thread so their info groups are quick to
+        create once scrolled to. Stops early if called again or by `cancel_paradigms`.
+        `CompiledView`s are skipped, their paradigms are already compiled
+        """
+        vocab_list = [vocab for vocab in vocab_list if not isinstance(vocab, CompiledView)]
+        self.paradigm_generation += 1
+        generation = self.paradigm_generation
+        progress = self.paradigm_progress = [0, len(vocab_list)]
+
+        def run():
+            for vocab in vocab_list:
+                if self.paradigm_generation != generation:
+                    return
+                self.prepare_paradigm(vocab)
+                progress[0] += 1
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def cancel_paradigms(self):
+        self.paradigm_generation += 1
+        self.paradigm_progress = [0, 0]
+
+    def update_progress(self):
+        """
+        Shows the progress of `prepare_paradigms` in the menu bar. Called every frame
+        """
+        done, total = self.paradigm_progress
+        if done < total:
+            dpg.set_value(self.progress_text, f"Preparing tables {done}/{total}")
+            dpg.show_item(self.progress_text)
+        else:
+            dpg.hide_item(self.progress_text)
+
     def create_verb_info_group(self, verb:Verb):
         with dpg.group() as verb_info_group:
             if verb.conjugations[Mood.Infinitive] is not None:
@@ -241,22 +654,14 @@ class Visualizer:
             dpg.add_spacer()
             return noun_info_group
     
-    def create_vocab_info_group(self, vocab:Vocab):
+    def create_vocab_info_group(self, vocab:Vocab, parent:int):
         """
-        Creates and returns the group with the vocab's information.
-        
-        The info group is put in `self.vocab_info[vocab]["group"]`
-
-        If the info group is already created it will just return the group
+        Creates and returns the group with the vocab's information in `parent`
         """
 
-        if (vocab_info_group := self.vocab_info[vocab]["info-group"]) != None:
-            return vocab_info_group
-
-        with dpg.group(parent=self.vocab_info[vocab]["group"], horizontal=True) as vocab_info_group:
+        with dpg.group(parent=parent, horizontal=True) as vocab_info_group:
             dpg.add_spacer()
             dpg.add_spacer()
-            self.vocab_info[vocab]["info-group"] = vocab_info_group
 
             if isinstance(vocab, Verb):
                 self.create_verb_info_group(vocab)
@@ -264,26 +669,58 @@ class Visualizer:
             if isinstance(vocab, Noun):
                 self.create_noun_info_group(vocab)
             
-            self.vocab_info[vocab]["expanded"] = True
-            
             return vocab_info_group
     
     def toggle_vocab_info_group(self, vocab:Vocab, toggle:int = 0):
         """
-        Show/hide the vocab's information. If the info group hasn't been created yet it will create the info group
+        Show/hide the vocab's information. The info group is created when its row is next drawn
         """
 
         expanded = self.vocab_info[vocab]["expanded"]
-        vocab_info_group = self.create_vocab_info_group(vocab)
 
         if expanded and toggle != 1:
-            dpg.hide_item(vocab_info_group)
             self.vocab_info[vocab]["expanded"] = False
         elif not expanded and toggle != -1:
-            dpg.show_item(vocab_info_group)
             self.vocab_info[vocab]["expanded"] = True
+        else:
+            return
+
+        self.vocab_list.invalidate()
+    
+    def create_vocab_row(self, vocab:Vocab, parent:int):
+        cb = lambda _1, _2, voc: self.toggle_vocab_info_group(voc, 0)
+
+        with dpg.group(parent=parent, horizontal=True, horizontal_spacing=0):
+            for desc, desc_type in vocab.get_parsed_description():
+                theme = None
+                font = None
+                match desc_type:
+                    case DescBlockType.Text:
+                        pass
+                    case DescBlockType.VocabType:
+                        theme = "vocab_theme"
+                    case DescBlockType.Latin:
+                        theme = "latin_theme"
+                        font = self.bold_font
+                    case DescBlockType.Definition:
+                        theme = "definition_theme"
+                        font = self.italic_font
+                    case DescBlockType.Gender:
+                        theme = "gender_theme"
+                    case DescBlockType.DebugInfo:
+                        theme = "debug_info_theme"
+                        continue
+                
+                text = dpg.add_button(label=desc, callback=cb, user_data=vocab)
+                if theme is not None: dpg.bind_item_theme(text, theme)
+                if font is not None: dpg.bind_item_font(text, font)
     
     def create_vocab_list_window(self):
+        for vocab_list in self.vocab.values():
+            for vocab in vocab_list:
+                self.vocab_info[vocab] = {"expanded": False}
+                self.visible_vocab.add(vocab)
+
         with dpg.window(label="Vocab List", tag="VocabList", horizontal_scrollbar=True) as self.vocab_window:
             # dpg.bind_item_theme(self.window, "vocab_info_inner_group_theme")
             with dpg.menu_bar():
@@ -293,66 +730,65 @@ class Visualizer:
                     dpg.add_menu_item(label="Save As")
 
                 def expand_all():
-                    for header in self.headers:
-                        dpg.set_value(header, True)
-                    for callback in self.vocab_expansion_callback:
-                        callback(1)
+                    # Only rows scrolled to get an info group, the paradigms of the rest are prepared in the background
+                    for vocab_info in self.vocab_info.values():
+                        vocab_info["expanded"] = True
+                    self.vocab_list.set_all_headers_open(True)
+                    self.prepare_paradigms([vocab for vocab_list in self.vocab.values() for vocab in vocab_list])
                 
                 def collapse_all():
-                    for header in self.headers:
-                        dpg.set_value(header, False)
-                    for callback in self.vocab_expansion_callback:
-                        callback(-1)
+                    for vocab_info in self.vocab_info.values():
+                        vocab_info["expanded"] = False
+                    self.vocab_list.set_all_headers_open(False)
+                    self.cancel_paradigms()
 
                 dpg.add_menu_item(label="Expand all", callback=expand_all)
                 dpg.add_menu_item(label="Collapse all", callback=collapse_all)
+                self.progress_text = dpg.add_text("", show=False)
             
             self.filter_menu = FilterMenu(self)
 
-            for header_text, vocab_list in self.vocab.items():
-                with dpg.collapsing_header(label=header_text, default_open=True) as header:
-                    self.headers.append(header)
-                    for vocab in vocab_list:
-                        with dpg.group() as vocab_group:
-                            self.vocab_info[vocab] = {"group": vocab_group, "info-group": None, "expanded": False}
-
-                            cb = lambda _1, _2, voc: self.toggle_vocab_info_group(voc, 0)
-                            cb_dat = vocab
-                            self.vocab_expansion_callback.append(
-                                lambda toggle=0, cb_dat=cb_dat: self.toggle_vocab_info_group(cb_dat, toggle)
-                            )
-
-                            with dpg.group(horizontal=True, horizontal_spacing=0):
-                                for desc, desc_type in vocab.get_parsed_description():
-                                    theme = None
-                                    font = None
-                                    match desc_type:
-                                        case DescBlockType.Text:
-                                            pass
-                                        case DescBlockType.VocabType:
-                                            theme = "vocab_theme"
-                                        case DescBlockType.Latin:
-                                            theme = "latin_theme"
-                                            font = self.bold_font
-                                        case DescBlockType.Definition:
-                                            theme = "definition_theme"
-                                            font = self.italic_font
-                                        case DescBlockType.Gender:
-                                            theme = "gender_theme"
-                                        case DescBlockType.DebugInfo:
-                                            theme = "debug_info_theme"
-                                            continue
-                                    
-                                    text = dpg.add_button(label=desc, callback=cb, user_data=cb_dat)
-                                    if theme is not None: dpg.bind_item_theme(text, theme)
-                                    if font is not None: dpg.bind_item_font(text, font)
+            self.vocab_list = VirtualVocabList(self)
+            self.vocab_list.create()
 
         
         with dpg.handler_registry():
             dpg.add_key_press_handler(key=dpg.mvKey_F, callback=lambda a,b: print(a))
 
-    def visualize(self):
+    @staticmethod
+    def get_used_glyphs(vocab:dict[str,list[Vocab]]) -> list[int]:
+        """
+        Returns the code points beyond printable ascii in the headers and descriptions of `vocab`,
+        plus the long vowels that inflected forms can add
+        """
+        chars = set(long_vowels + long_vowels.upper())
+        for header_text, vocab_list in vocab.items():
+            chars.update(header_text)
+            for voc in vocab_list:
+                chars.update(voc.get_clean_description())
+        return sorted(ord(char) for char in chars if ord(char) > 0x7E)
+
+    def add_font(self, path:str, glyphs:list[int]) -> int:
+        with dpg.font(path, 30) as font:
+            dpg.add_font_range(0x0020, 0x007E)
+            dpg.add_font_chars(glyphs)
+        return font
+
+    def visualize(self, show_tools:bool = False):
+        """
+        Opens the GUI and runs until it is closed. `show_tools` also opens the DearPyGui demo and
+        font manager. A breakdown of the startup time is printed once the first frame is drawn
+        """
+        startup_times: dict[str, float] = {}
+        start = time.perf_counter()
+        def lap(name:str):
+            nonlocal start
+            now = time.perf_counter()
+            startup_times[name] = now - start
+            start = now
+
         dpg.create_context()
+        lap("context")
 
         with dpg.theme(tag="vocab_theme"):
             with dpg.theme_component():
@@ -373,40 +809,77 @@ class Visualizer:
         with dpg.theme(tag="debug_info_theme"):
             with dpg.theme_component():
                 dpg.add_theme_color(dpg.mvThemeCol_Text, [151, 151, 151])
-            
+        lap("themes")
+
+        # Only the glyphs in use are rasterised, the full 0x0020-0x01FF range makes the atlas several times larger
+        glyphs = self.get_used_glyphs(self.vocab)
         with dpg.font_registry():
-            with dpg.font("fonts/NotoSans-Medium.ttf", 30) as self.default_font:
-                dpg.add_font_range(0x0020, 0x01FF)
-                dpg.bind_font(self.default_font)
-            with dpg.font("fonts/NotoSans-Bold.ttf", 30) as self.bold_font:
-                dpg.add_font_range(0x0020, 0x01FF)
-            with dpg.font("fonts/NotoSans-Italic.ttf", 30) as self.italic_font:
-                dpg.add_font_range(0x0020, 0x01FF)
+            self.default_font = self.add_font("fonts/NotoSans-Medium.ttf", glyphs)
+            dpg.bind_font(self.default_font)
+            self.bold_font = self.add_font("fonts/NotoSans-Bold.ttf", glyphs)
+            self.italic_font = self.add_font("fonts/NotoSans-Italic.ttf", glyphs)
             dpg.set_global_font_scale(0.5)
+        lap("fonts")
 
         dpg.create_viewport(title='Latin Study')
 
         # with dpg.window(label="Vocab List", tag="VocabList"):
         #     dpg.add_text("List!")
         self.create_vocab_list_window()
+        lap("windows")
 
-        demo.show_demo()
-        dpg.show_font_manager()
+        if show_tools:
+            demo.show_demo()
+            dpg.show_font_manager()
 
         dpg.setup_dearpygui()
         # dpg.set_primary_window("VocabList", True)
         dpg.show_viewport()
-        dpg.start_dearpygui()
+        lap("setup")
+
+        self.filter_worker = FilterWorker(
+            lambda filter_state, is_cancelled: self.filter_menu.get_visible_vocab(filter_state, is_cancelled),
+            self.visible_vocab
+        )
+        first_frame = True
+        while dpg.is_dearpygui_running():
+            self.apply_pending_visibility()
+            self.vocab_list.update()
+            self.update_progress()
+            dpg.render_dearpygui_frame()
+
+            if first_frame:
+                # The font atlas is built while drawing the first frame
+                lap("first frame")
+                print("Startup: " + ", ".join(f"{name} {t*1000:.1f} ms" for name, t in startup_times.items()) +
+                    f" (total {sum(startup_times.values())*1000:.1f} ms, {len(glyphs)} extra glyphs)")
+                first_frame = False
+
         dpg.destroy_context()
     
     def update_visiblity(self):
-        for header, vocab_list in self.vocab.items():
-            for vocab in vocab_list:
-                vocab_group = self.vocab_info[vocab]["group"]
-                if self.filter_menu.should_be_visible(vocab):
-                    dpg.show_item(vocab_group)
-                else:
-                    dpg.hide_item(vocab_group)
+        """
+        Re-evaluates the filters; on `self.filter_worker` if it is running, otherwise right away.
+        The vocab list only rebuilds its rows if the visibility of some vocab changed
+        """
+        if self.filter_worker is not None:
+            self.filter_worker.submit(self.filter_menu.get_filter_state())
+            return
+
+        visible_vocab = self.filter_menu.get_visible_vocab()
+        self.apply_visibility_diff(self.visible_vocab - visible_vocab, visible_vocab - self.visible_vocab, visible_vocab)
+
+    def apply_visibility_diff(self, hide:set[Vocab], show:set[Vocab], visible_vocab:set[Vocab]):
+        self.visible_vocab = visible_vocab
+        if len(hide) > 0 or len(show) > 0:
+            self.vocab_list.invalidate()
+
+    def apply_pending_visibility(self):
+        """
+        Applies the latest result of `self.filter_worker`. Called every frame
+        """
+        if self.filter_worker is not None and (diff := self.filter_worker.pop_visibility_diff()) is not None:
+            self.apply_visibility_diff(*diff)
 
 
 if __name__ == "__main__":
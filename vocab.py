@@ -1,5 +1,7 @@
 import logging
-from typing import TypeAlias
+import sys
+import threading
+from typing import TypeAlias, Iterable
 from enum import Enum, IntEnum
 
 
@@ -86,13 +88,67 @@ class DescBlockType(Enum):
 
 
 
+def parse_description(description: str) -> list[tuple[str, DescBlockType]]:
+    """
+    Splits a description coloured with `PCol` codes (see `loader.VocabReader.read_data`) into
+    blocks of text and their type
+    """
+    parsed_desc = []
+
+    for desc in description.split(PCol.CEND.value):
+        desc_block_type = DescBlockType.Text
+        cutpoint = 0
+        for dbt in DescBlockType:
+            if dbt == DescBlockType.Text:
+                continue
+            if (cutpoint := desc.find(dbt.value)) != -1:
+                desc = desc.replace(dbt.value, "")
+                desc_block_type = dbt
+                break
+
+        if cutpoint != 0:
+            parsed_desc.append((desc[:cutpoint], DescBlockType.Text,))
+            desc = desc[cutpoint:]
+    
+        parsed_desc.append((desc, desc_block_type,))
+    
+    return parsed_desc
+
+
 class Vocab:
+    __slots__ = ("parsed_description", "_clean_description", "loaded")
+
     def __init__(self):
-        self.description = ""
+        self.parsed_description: list[tuple[str, DescBlockType]] = []
+        """
+        The description as blocks of text and their type. Set once when the vocab is read
+        """
+        self._clean_description: str|None = None
         self.loaded = False
     
     def __hash__(self):
-        return hash(self.description)
+        return hash(self.get_clean_description())
+
+    @property
+    def vocab_type(self) -> "type[Vocab]":
+        """
+        The class of this vocab. Compiled vocab (see `compiled.CompiledView`) give the class they stand in for
+        """
+        return type(self)
+    
+    @property
+    def description(self) -> str:
+        """
+        The description coloured with `PCol` codes for printing to a terminal. Built on each access
+        """
+        return "".join(
+            desc if desc_type == DescBlockType.Text else desc_type.value + desc + PCol.CEND.value
+            for desc, desc_type in self.parsed_description)
+    
+    @description.setter
+    def description(self, description: str):
+        self.parsed_description = parse_description(description)
+        self._clean_description = None
     
     def load(self):
         self.loaded = True
@@ -101,33 +157,13 @@ class Vocab:
         return ""
 
     def get_parsed_description(self) -> list[tuple[str, DescBlockType]]:
-        parsed_desc = []
-
-        for desc in self.description.split(PCol.CEND.value):
-            desc_block_type = DescBlockType.Text
-            cutpoint = 0
-            for dbt in DescBlockType:
-                if dbt == DescBlockType.Text:
-                    continue
-                if (cutpoint := desc.find(dbt.value)) != -1:
-                    desc = desc.replace(dbt.value, "")
-                    desc_block_type = dbt
-                    break
-
-            if cutpoint != 0:
-                parsed_desc.append((desc[:cutpoint], DescBlockType.Text,))
-                desc = desc[cutpoint:]
-        
-            parsed_desc.append((desc, desc_block_type,))
-        
-        return parsed_desc
+        return self.parsed_description
 
     def get_clean_description(self):
-        clean_desc = ""
-        for desc, desc_type in self.get_parsed_description():
-            if desc_type != DescBlockType.DebugInfo:
-                clean_desc += desc
-        return clean_desc
+        if self._clean_description is None:
+            self._clean_description = "".join(
+                desc for desc, desc_type in self.parsed_description if desc_type != DescBlockType.DebugInfo)
+        return self._clean_description
 
 
 PrincipalParts: TypeAlias = tuple[str,str,str,str]
@@ -168,7 +204,141 @@ class Mood(IntEnum):
 #     return int(len(enum_type))
 
 
+suffixes: list[str] = []
+"""
+Every suffix used by a paradigm table, indexed by its id (see `intern_suffix`)
+"""
+suffix_ids: dict[str, int] = {}
+
+paradigm_lock = threading.RLock()
+"""
+Held while adding to `suffixes` or to the cached paradigm tables, since vocab can be conjugated and
+declined on several threads (eg. by `visualizer.Visualizer.prepare_paradigms` while the UI reads them)
+"""
+
+def intern_suffix(suffix: str) -> int:
+    """
+    Returns the id of `suffix` in `suffixes`, adding it if needed
+    """
+    if (suffix_id := suffix_ids.get(suffix)) is None:
+        with paradigm_lock:
+            if (suffix_id := suffix_ids.get(suffix)) is None:
+                suffixes.append(sys.intern(suffix))
+                suffix_id = suffix_ids[suffix] = len(suffixes) - 1
+    return suffix_id
+
+
+ParadigmCell: TypeAlias = tuple[int, int|None, int]
+"""
+`(stem index, stop, suffix id)` where the form is `stems[stem index][:stop] + suffixes[suffix id]`
+"""
+
+paradigm_tables: dict[tuple[tuple[int, int|None, str], ...], tuple[ParadigmCell, ...]] = {}
+
+def paradigm_table(cells: Iterable[tuple[int, int|None, str]]) -> tuple[ParadigmCell, ...]:
+    """
+    Returns the table of `ParadigmCell`s for `cells` given as `(stem index, stop, suffix)`.
+    Equal tables are only stored once and shared by every `Paradigm` using them
+    """
+    cells = tuple(cells)
+    if (table := paradigm_tables.get(cells)) is None:
+        with paradigm_lock:
+            if (table := paradigm_tables.get(cells)) is None:
+                table = paradigm_tables[cells] = tuple(
+                    (stem_index, stop, intern_suffix(suffix),) for stem_index, stop, suffix in cells)
+    return table
+
+
+def _unpickle_paradigm(stems: tuple[str,...], cells: tuple[tuple[int, int|None, str], ...], overrides: dict[int,str]|None) -> "Paradigm":
+    paradigm = Paradigm(stems, paradigm_table(cells))
+    paradigm.overrides = overrides
+    return paradigm
+
+
+class Paradigm:
+    """
+    Read-mostly list of inflected forms stored as a few interned stems and a shared table (see
+    `paradigm_table`) instead of one string per form. Forms are built when they are indexed
+    """
+    __slots__ = ("stems", "table", "overrides")
+
+    def __init__(self, stems: tuple[str,...], table: tuple[ParadigmCell, ...]):
+        self.stems = tuple(sys.intern(stem) for stem in stems)
+        self.table = table
+
+        self.overrides: dict[int,str]|None = None
+        """
+        Forms set through `__setitem__` (ie. irregular forms), by index
+        """
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self.table)
+        if self.overrides is not None and (form := self.overrides.get(index)) is not None:
+            return form
+
+        stem_index, stop, suffix_id = self.table[index]
+        return self.stems[stem_index][:stop] + suffixes[suffix_id]
+
+    def __setitem__(self, index: int, form: str):
+        if index < 0:
+            index += len(self.table)
+        if not 0 <= index < len(self.table):
+            raise IndexError("Paradigm index out of range")
+
+        if self.overrides is None:
+            self.overrides = {}
+        self.overrides[index] = form
+
+    def __len__(self):
+        return len(self.table)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.table)))
+
+    def __repr__(self) -> str:
+        return f"Paradigm({list(self)})"
+
+    def __reduce__(self):
+        # Suffix ids are only valid in this process, so pickle the suffixes themselves
+        cells = tuple((stem_index, stop, suffixes[suffix_id],) for stem_index, stop, suffix_id in self.table)
+        return (_unpickle_paradigm, (self.stems, cells, self.overrides,))
+
+
+class Conjugations:
+    """
+    Behaves like the list `[indicative, imperative, infinitive, subjunctive]` of a `Verb` but each mood
+    is only conjugated (see `Verb.conjugate_mood`) the first time it is read
+    """
+    __slots__ = ("verb", "moods", "conjugated")
+
+    def __init__(self, verb: "Verb"):
+        self.verb = verb
+        self.moods: list[Paradigm|str|None] = [None] * len(Mood)
+        self.conjugated: list[bool] = [False] * len(Mood)
+
+    def __getitem__(self, mood: Mood) -> Paradigm|str|None:
+        if not self.conjugated[mood]:
+            if not self.verb.loaded:
+                return None
+            self.moods[mood] = self.verb.conjugate_mood(Mood(mood))
+            self.conjugated[mood] = True
+        return self.moods[mood]
+
+    def __setitem__(self, mood: Mood, conjugations: Paradigm|str|None):
+        self.moods[mood] = conjugations
+        self.conjugated[mood] = True
+
+    def __len__(self):
+        return len(Mood)
+
+    def __iter__(self):
+        return (self[mood] for mood in Mood)
+
+
 class Verb(Vocab):
+    __slots__ = ("principal_parts", "english", "special_cases", "conjugation", "conjugations")
+
     @staticmethod
     def _replace_ending(somestr:str, old:str, new:str):
         if somestr[-len(old):] == old:
@@ -181,22 +351,23 @@ class Verb(Vocab):
         self.principal_parts = principal_parts
         self.english = english
 
-        self.special_cases:dict[tuple[tuple[str, str], ...],str] = {}
+        self.special_cases:dict[int,str] = {}
         """
         Dictionary from the parsing of a case to an irregular conjugation for that parsing
 
-        example keys
-        `(("Mood", "Imperative"), ("Number", "Singular"))`
+        Keys are made with `Verb.special_case_key`, for example
+        `Verb.special_case_key(Mood.Imperative, Number.Singular)`
         or
-        `(("Mood", "Indicative"), ("Number", "Singular"), ("Person", "First"), ("Tense", "Pluperfect"))`
+        `Verb.special_case_key(Mood.Indicative, Number.Singular + Person.First + Tense.Pluperfect)`
 
-        Mood must come first. The order of the others doesn't matter
+        Leaving out the parsing replaces the whole mood
         """
 
         self.conjugation:int = -1
 
-        self.conjugations:list[list[str]|str|None] = [None] * 4
+        self.conjugations = Conjugations(self)
         """
+        Each mood is conjugated the first time it is accessed (once the verb is loaded).
         Access each conjugation the following way:
 
         `self.conjugations[Mood.Indicative][Number + Person + Tense]` or `self.conjugations[Mood.Indicative][Number + Person + Aspect + Time]` (since `Tense = Aspect + Time`)
@@ -218,196 +389,194 @@ class Verb(Vocab):
         all_conjugations.append(self.conjugations[Mood.Infinitive])
         return ", ".join(all_conjugations)
     
-    def _perfect_active_conjugation(self):
-        perf_stem:str = self.principal_parts[2][:-1]
-        if len(self.principal_parts[2]) == 0 or self.principal_parts[2][-1] != 'ī':
-            logging.warning(f"Cannot conjugate {self.description} in the perfect active system")
-            return
+    # Suffixes of the indicative, indexed by `Number + Person + Time` (one line per `Time`)
+    _first_and_second_suffixes = (
+        "ō",   "mus",    "s",   "tis",    "t",   "nt",
+        "bam", "bāmus",  "bās", "bātis",  "bāt", "bānt",
+        "bō",  "bimus",  "bis", "bitis",  "bit", "bunt",
+    )
+
+    _third_and_fourth_suffixes = (
+        "ō",    "mus",     "s",    "tis",     "t",    "unt",
+        "ēbam", "ēbāmus",  "ēbās", "ēbātis",  "ēbat", "ēbant",
+        "am",   "ēmus",    "ēs",   "ētis",    "et",   "ent",
+    )
+
+    _perfect_suffixes = (
+        "ī",    "imus",    "istī", "istis",   "it",   "ērunt",
+        "eram", "erāmus",  "erās", "erātis",  "erat", "erant",
+        "erō",  "erimus",  "eris", "eritis",  "erit", "erint",
+    )
+
+    StemRule: TypeAlias = tuple[int|None, str]
+    """
+    `(stop, ending)` where the conjugated form is `stem[:stop] + ending`
+    """
 
-        perf_suffixes = (
-            "ī",    "imus",
-            "istī", "istis",
-            "it",   "ērunt",
-        )
+    _progressive_tables: dict[tuple[int, str, bool], tuple[StemRule, ...]] = {}
+    """
+    Compiled progressive tables (see `_progressive_table`), shared by all verbs
+    """
 
-        pluperf_suffixes = (
-            "eram", "erāmus",
-            "erās", "erātis",
-            "erat", "erant",
-        )
+    _indicative_tables: dict[tuple[int, str, bool, bool], tuple[ParadigmCell, ...]] = {}
+    """
+    Paradigm tables of the whole indicative (see `_indicative_table`), shared by all verbs
+    """
 
-        futperf_suffixes = (
-            "erō",  "erimus",
-            "eris", "eritis",
-            "erit", "erint",
-        )
+    _imperative_table = paradigm_table(((0, None, "",), (0, None, "te",),))
+
+    special_case_stride = len(Number) * len(Person) * len(Tense) + 1
+
+    @classmethod
+    def special_case_key(cls, mood: Mood, parsing: int|None = None) -> int:
+        """
+        Returns the key of `special_cases` for the form at index `parsing` of `mood` (eg.
+        `Number + Person + Tense` for the indicative), or for the whole mood if `parsing` is `None`
+        """
+        return mood * cls.special_case_stride + (0 if parsing is None else parsing + 1)
+
+    @classmethod
+    def special_case_parsing(cls, key: int) -> tuple[Mood, int|None]:
+        """
+        Inverse of `special_case_key`
+        """
+        mood, parsing = divmod(key, cls.special_case_stride)
+        return (Mood(mood), None if parsing == 0 else parsing - 1,)
+
+    @classmethod
+    def _compile_progressive_table(cls, conjugation: int, stem_vowel: str, io_stem: bool) -> tuple[StemRule, ...]:
+        """
+        Returns the `StemRule` of every cell of the progressive indicative, indexed by `Number + Person + Time`
+        """
+        table: list[Verb.StemRule] = [(None, "")] * len(Number) * len(Person) * len(Time)
 
         for pers in Person:
             for num in Number:
                 for time in Time:
-                    suffix = None
-                    if time == Time.Present:
-                        suffix = perf_suffixes[pers+num]
-                    elif time == Time.Past:
-                        suffix = pluperf_suffixes[pers+num]
-                    elif time == Time.Future:
-                        suffix = futperf_suffixes[pers+num]
-                    
-                    conj = perf_stem + suffix
-                    self.conjugations[Mood.Indicative][Aspect.Perfective + time + pers + num] = conj
-    
-    def _first_and_second_conjugation(self):
-        prog_stem:str = self.conjugations[Mood.Infinitive][:-2]
-
-        self.conjugations[Mood.Indicative] = [""] * len(Number) * len(Person) * len(Tense)
-        prog_suffixes = (
-            "ō", "mus",
-            "s", "tis",
-            "t", "nt",
-        )
-        for pers in Person:
-            for num in Number:
-                for time in Time:
-                    suffix = prog_suffixes[pers+num]
-                    infix = ""
-
-                    if time == Time.Past:
-                        if pers == Person.First and num == Number.Singular:
-                            infix = "ba"
-                            suffix = "m"
-                        else:
-                            infix = "bā"
-
-                    elif time == Time.Future:
-                        if pers == Person.First and num == Number.Singular:
-                            infix = "b"
-                        elif pers == Person.Third and num == Number.Plural:
-                            infix = "bu"
-                        else:
-                            infix = "bi"
+                    index = time + pers + num
 
-                    conj = prog_stem + infix + suffix
+                    if conjugation in (1, 2,):
+                        # The endings only ever change the last vowel of the stem
+                        ending = stem_vowel + cls._first_and_second_suffixes[index]
 
-                    # First conj
-                    conj = self._replace_ending(conj, "āō", "ō")
-                    conj = self._replace_ending(conj, "āt", "at")
-                    conj = self._replace_ending(conj, "ānt", "ant")
+                        # First conj
+                        ending = cls._replace_ending(ending, "āō", "ō")
+                        ending = cls._replace_ending(ending, "āt", "at")
+                        ending = cls._replace_ending(ending, "ānt", "ant")
 
-                    # Second conj
-                    conj = self._replace_ending(conj, "ēō", "eō")
-                    conj = self._replace_ending(conj, "ēt", "et")
-                    conj = self._replace_ending(conj, "ēnt", "ent")
+                        # Second conj
+                        ending = cls._replace_ending(ending, "ēō", "eō")
+                        ending = cls._replace_ending(ending, "ēt", "et")
+                        ending = cls._replace_ending(ending, "ēnt", "ent")
 
-                    self.conjugations[Mood.Indicative][Aspect.Progressive + time + pers + num] = conj
-        
-        self._perfect_active_conjugation()
+                        table[index] = (-1, ending,)
+                        continue
 
-        self.conjugations[Mood.Imperative] = [prog_stem, prog_stem + "te"]
+                    suffix = cls._third_and_fourth_suffixes[index]
 
-    def _third_and_fourth_conjugation(self):
-        prog_stem:str = self.conjugations[Mood.Infinitive][:-2]
+                    if conjugation == 3:
+                        if io_stem or (time == Time.Present and not (
+                                (pers == Person.First and num == Number.Singular)
+                                or (pers == Person.Third and num == Number.Plural))):
+                            suffix = 'i' + suffix
+                        table[index] = (-1, suffix,)
 
-        self.conjugations[Mood.Indicative] = [""] * len(Number) * len(Person) * len(Tense)
+                    elif conjugation == 4:
+                        if suffix[0] in (vowels + long_vowels) or suffix[-1] == 't':
+                            table[index] = (-1, 'i' + suffix,)
+                        else:
+                            table[index] = (None, suffix,)
 
-        pres_suffixes = (
-            "ō", "mus",
-            "s", "tis",
-            "t", "unt",
-        )
+                    else:
+                        table[index] = (0, suffix,)
 
-        imperf_suffixes = (
-            "ēbam", "ēbāmus",
-            "ēbās", "ēbātis",
-            "ēbat", "ēbant",
-        )
+        return tuple(table)
 
-        fut_suffixes = (
-            "am", "ēmus",
-            "ēs", "ētis",
-            "et", "ent",
-        )
+    @classmethod
+    def _progressive_table(cls, conjugation: int, stem_vowel: str, io_stem: bool) -> tuple[StemRule, ...]:
+        if conjugation in (1, 2,):
+            io_stem = False
+        else:
+            stem_vowel = ""
+            if conjugation != 3:
+                io_stem = False
+
+        key = (conjugation, stem_vowel, io_stem,)
+        if (table := cls._progressive_tables.get(key)) is None:
+            with paradigm_lock:
+                if (table := cls._progressive_tables.get(key)) is None:
+                    table = cls._progressive_tables[key] = cls._compile_progressive_table(*key)
+        return table
+
+    @classmethod
+    def _indicative_table(cls, conjugation: int, stem_vowel: str, io_stem: bool, has_perfect: bool) -> tuple[ParadigmCell, ...]:
+        """
+        Returns the paradigm table of the indicative for the stems `(progressive stem, perfect stem)`.
+        `Aspect.Progressive` cells come first, followed by the `Aspect.Perfective` ones
+        """
+        key = (conjugation, stem_vowel, io_stem, has_perfect,)
+        if (table := cls._indicative_tables.get(key)) is None:
+            cells = [(0, stop, ending,) for stop, ending in cls._progressive_table(conjugation, stem_vowel, io_stem)]
+            if has_perfect:
+                cells += [(1, None, suffix,) for suffix in cls._perfect_suffixes]
+            else:
+                cells += [(1, 0, "",)] * len(cls._perfect_suffixes)
+
+            with paradigm_lock:
+                table = cls._indicative_tables.setdefault(key, paradigm_table(cells))
+        return table
+
+    def conjugate_mood(self, mood: Mood) -> Paradigm|str|None:
+        """
+        Returns the conjugations of `mood` including `self.special_cases`. Prefer
+        `self.conjugations[mood]`, which only calls this once per mood
+        """
+        prog_stem:str = self.principal_parts[1][:-2]
+        conjugations = None
 
-        for pers in Person:
-            for num in Number:
-                for time in Time:
-                    suffix = None
+        match mood:
+            case Mood.Infinitive:
+                conjugations = self.principal_parts[1]
 
-                    if time == Time.Present:
-                        suffix = pres_suffixes[pers+num]
+            case Mood.Indicative:
+                if self.conjugation == 4:
+                    assert prog_stem[-1] == 'ī'
 
-                    elif time == Time.Past:
-                        suffix = imperf_suffixes[pers+num]
+                perf_stem:str = self.principal_parts[2][:-1]
+                has_perfect = len(self.principal_parts[2]) > 0 and self.principal_parts[2][-1] == 'ī'
+                if not has_perfect:
+                    logging.warning(f"Cannot conjugate {self.description} in the perfect active system")
 
-                    elif time == Time.Future:
-                        suffix = fut_suffixes[pers+num]
-                    
-                    modified_stem = ""
+                table = self._indicative_table(
+                    self.conjugation, prog_stem[-1:], self.principal_parts[0].endswith("iō"), has_perfect)
+                conjugations = Paradigm((prog_stem, perf_stem,), table)
 
-                    if self.conjugation == 3:
-                        modified_stem = prog_stem[:-1]
-                        
-                        if self.principal_parts[0].endswith("iō"):
-                            modified_stem += 'i'
+            case Mood.Imperative:
+                conjugations = Paradigm((prog_stem,), self._imperative_table)
 
-                        elif time == Time.Present and not (
-                                (pers == Person.First and num == Number.Singular)
-                                or (pers == Person.Third and num == Number.Plural)):
-                            modified_stem += 'i'
-                        
-                    elif self.conjugation == 4:
-                        assert prog_stem[-1] == 'ī'
-                        if suffix[0] in (vowels + long_vowels) or suffix[-1] == 't':
-                            modified_stem = self._replace_ending(prog_stem, 'ī', 'i')
-                        else:
-                            modified_stem = prog_stem
+        for key, conjugation in self.special_cases.items():
+            special_mood, parsing = self.special_case_parsing(key)
+            if special_mood != mood:
+                continue
 
-                    conj = modified_stem + suffix
-                    self.conjugations[Mood.Indicative][Aspect.Progressive + time + pers + num] = conj
+            if parsing is None:
+                conjugations = conjugation
+            else:
+                conjugations[parsing] = conjugation
 
-        self._perfect_active_conjugation()
-        
-        self.conjugations[Mood.Imperative] = [prog_stem, prog_stem + "te"]
-        self._replace_ending(self.conjugations[Mood.Imperative][Number.Plural], "ete", "ite")
+        return conjugations
     
     def conjugate(self):
-        self.conjugations[Mood.Infinitive] = self.principal_parts[1]
-
-        conjugation_funcs = [
-            self._first_and_second_conjugation,
-            self._first_and_second_conjugation,
-            self._third_and_fourth_conjugation,
-            self._third_and_fourth_conjugation
-        ]
-        try:
-            conjugation_funcs[self.conjugation-1]()
-
-            mood = None
-            total_parsing = None
-            for parsing, conjugation in self.special_cases.items():
-                for i, (parse_type, parse,) in enumerate(parsing):
-                    if i == 0:
-                        assert parse_type == Mood.__name__
-                        mood = Mood[parse]
-                    else:
-                        if total_parsing == None: total_parsing = 0
-
-                        potential_types = (Number, Person, Time, Aspect, Tense,)
-                        potential_types = {pt.__name__ : pt for pt in potential_types}
-                        total_parsing += potential_types[parse_type][parse].value
-                
-                if total_parsing is None:
-                    self.conjugations[mood] = conjugation
-                else:
-                    self.conjugations[mood][total_parsing] = conjugation
-
-        except NotImplementedError:
-            logging.warning(f"Cannot yet conjugate {self.conjugation}-th conjugation verbs: {self.description}")
+        """
+        Conjugates every mood now instead of on first access
+        """
+        for mood in Mood:
+            self.conjugations[mood]
     
     def load(self):
         super().load()
 
         self.conjugation = self.determine_conjugation()
-        self.conjugate()
 
     def determine_conjugation(self) -> int:
         assert len(self.principal_parts) in (3,4,) and len(self.principal_parts[1]) >= 3
@@ -423,7 +592,7 @@ class Verb(Vocab):
 
 
 class Adverb(Vocab):
-    pass
+    __slots__ = ()
         
 
 class Case(IntEnum):
@@ -436,16 +605,43 @@ class Case(IntEnum):
 
 
 class Declinable(Vocab):
+    __slots__ = ("declension",)
+
+    _declension_tables: dict[tuple[int, Gender], tuple[ParadigmCell, ...]|None] = {}
+    """
+    Paradigm tables (see `_compile_declension_table`), shared by all declinables
+    """
+
+    _empty_declension_table = paradigm_table([(0, 0, "",)] * len(Case) * len(Number))
+
     def __init__(self):
         super().__init__()
         self.declension = 0
 
-    def decline(self, nom_sg:str, base:str, gender:Gender) -> list[str]:
+    def decline(self, nom_sg:str, base:str, gender:Gender) -> Paradigm:
+        key = (self.declension, gender,)
+        if key not in self._declension_tables:
+            with paradigm_lock:
+                if key not in self._declension_tables:
+                    self._declension_tables[key] = self._compile_declension_table(self.declension, gender)
+        
+        if (table := self._declension_tables[key]) is None:
+            logging.warning(f"Cannot yet decline {self.declension}-th declension words: {self.description}")
+            return Paradigm(("",), self._empty_declension_table)
+
+        return Paradigm((nom_sg, base,), table)
+
+    @staticmethod
+    def _compile_declension_table(declension: int, gender: Gender) -> tuple[ParadigmCell, ...]|None:
+        """
+        Returns the paradigm table of a declension for the stems `(nom. sg., base)`, or `None`
+        if the declension isn't supported
+        """
         endings = None
 
-        cases = [""] * len(Case) * len(Number)
+        cells: list[tuple[int, int|None, str]] = [(0, 0, "",)] * len(Case) * len(Number)
 
-        if self.declension == 1:
+        if declension == 1:
             endings = [
                 "a",  "ae",
                 "ae", "ārum",
@@ -455,7 +651,7 @@ class Declinable(Vocab):
                 "",   "",
             ]
 
-        elif self.declension == 2:
+        elif declension == 2:
             endings = [
                 "",   "ī",
                 "ī",  "ōrum",
@@ -468,7 +664,7 @@ class Declinable(Vocab):
                 endings[Case.Nominative + Number.Plural] = "a"
                 endings[Case.Accusative + Number.Plural] = "a"
 
-        elif self.declension == 3:
+        elif declension == 3:
             endings = [
                 "",   "ēs",
                 "is", "um",
@@ -483,30 +679,31 @@ class Declinable(Vocab):
                 endings[Case.Accusative + Number.Singular] = None
 
         else:
-            logging.warning(f"Cannot yet decline {self.declension}-th declension words: {self.description}")
-            return cases
+            return None
         
         for case in Case:
             for number in Number:
                 if case == Case.Nominative and number == Number.Singular:
-                    cases[case + number] = nom_sg
+                    cells[case + number] = (0, None, "",)
                 
-                elif gender == Gender.Neut and self.declension == 3 and case == Case.Accusative:
-                    cases[case + number] = cases[Case.Nominative + number]
+                elif gender == Gender.Neut and declension == 3 and case == Case.Accusative:
+                    cells[case + number] = cells[Case.Nominative + number]
                 
                 elif case == Case.Vocative:
                     if number == Number.Singular and endings[Case.Nominative + number].endswith("us"):
-                        cases[case + number] = base + "e"
+                        cells[case + number] = (1, None, "e",)
                     else:
-                        cases[case + number] = cases[Case.Nominative + number]
+                        cells[case + number] = cells[Case.Nominative + number]
 
                 elif endings[case + number] != "":
-                    cases[case + number] = base + endings[case + number]
+                    cells[case + number] = (1, None, endings[case + number],)
         
-        return cases
+        return paradigm_table(cells)
 
 
 class Noun(Declinable):
+    __slots__ = ("nom_sg", "gen_sg", "gender", "english", "_cases", "base", "plural_only")
+
     def __init__(self, nom_sg: str, gen_sg: str, gender: Gender, english: list[str]):
         super().__init__()
 
@@ -515,10 +712,25 @@ class Noun(Declinable):
         self.gender = gender
         self.english = english
 
-        self.cases: list[str] = [""] * len(Case) * len(Number)
+        self._cases: Paradigm|None = None
         self.base: str|None = None
         self.plural_only: bool = False
     
+    @property
+    def cases(self) -> Paradigm|list[str]:
+        """
+        Declined the first time it is accessed (once the noun is loaded)
+        """
+        if self._cases is None:
+            if not self.loaded:
+                return [""] * len(Case) * len(Number)
+            self._cases = self.decline(self.nom_sg, self.base, self.gender)
+        return self._cases
+    
+    @cases.setter
+    def cases(self, cases: Paradigm|list[str]):
+        self._cases = cases
+    
     def get_extended_description(self):
         return ", ".join(self.cases)
     
@@ -549,10 +761,10 @@ class Noun(Declinable):
             self.declension = 3
             self.base = self.gen_sg[:-2]
 
-        self.cases = self.decline(self.nom_sg, self.base, self.gender)
-
 
 class Adjective(Declinable):
+    __slots__ = ("masc", "fem", "neut", "english")
+
     def __init__(self, masc: str, fem: str, neut: str, english: list[str]):
         self.masc = masc
         self.fem = fem
@@ -561,16 +773,100 @@ class Adjective(Declinable):
 
 
 class Pronoun(Vocab):
-    pass
+    __slots__ = ()
 
 class Preoposition(Vocab):
-    pass
+    __slots__ = ()
 
 class Conjunction(Vocab):
-    pass
+    __slots__ = ()
 
 class Interjection(Vocab):
-    pass
+    __slots__ = ()
 
 class Unknown(Vocab):
-    pass
\ No newline at end of file
+    __slots__ = ()
+
+class Parsing:
+    """
+    The grammatical parsing of an inflected form. Fields that don't apply are `None`
+    """
+    __slots__ = ("mood", "tense", "person", "number", "case")
+
+    def __init__(self, mood: Mood|None = None, tense: Tense|None = None, person: Person|None = None,
+            number: Number|None = None, case: Case|None = None):
+        self.mood = mood
+        self.tense = tense
+        self.person = person
+        self.number = number
+        self.case = case
+
+    def __repr__(self) -> str:
+        return f"Parsing({self})"
+
+    def __str__(self) -> str:
+        return " ".join(p.name for p in (self.mood, self.tense, self.case, self.person, self.number) if p is not None)
+
+    @staticmethod
+    def from_conjugation(mood: Mood, index: int|None) -> "Parsing":
+        """
+        Returns the parsing of `verb.conjugations[mood][index]` (`index` is `None` for the infinitive)
+        """
+        if mood == Mood.Indicative:
+            tense = index - index % (len(Number) * len(Person))
+            person_number = index - tense
+            return Parsing(mood, Tense(tense), Person(person_number - person_number % len(Number)), Number(index % len(Number)))
+        elif mood == Mood.Imperative:
+            return Parsing(mood, number=Number(index))
+        return Parsing(mood)
+
+    @staticmethod
+    def from_case(index: int) -> "Parsing":
+        """
+        Returns the parsing of `noun.cases[index]`
+        """
+        return Parsing(number=Number(index % len(Number)), case=Case(index - index % len(Number)))
+
+
+class InflectionIndex:
+    """
+    Reverse index from every conjugated/declined form to the vocab and parsings it comes from.
+    Lookups ignore case and macrons (see `make_short`)
+    """
+    def __init__(self, vocab_list: Iterable[Vocab] = ()):
+        self.forms: dict[str, list[tuple[Vocab, Parsing]]] = {}
+        for vocab in vocab_list:
+            self.add(vocab)
+
+    @staticmethod
+    def normalize(form: str) -> str:
+        return make_short(form.strip().lower())
+
+    def _add_form(self, form: str|None, vocab: Vocab, parsing: Parsing):
+        if not form:
+            return
+        self.forms.setdefault(self.normalize(form), []).append((vocab, parsing,))
+
+    def add(self, vocab: Vocab):
+        """
+        Indexes every form of `vocab` (if it is a `Verb` or a `Noun`)
+        """
+        if isinstance(vocab, Verb):
+            for mood in Mood:
+                if (conjugations := vocab.conjugations[mood]) is None:
+                    continue
+                if isinstance(conjugations, str):
+                    self._add_form(conjugations, vocab, Parsing.from_conjugation(mood, None))
+                else:
+                    for i, form in enumerate(conjugations):
+                        self._add_form(form, vocab, Parsing.from_conjugation(mood, i))
+
+        elif isinstance(vocab, Noun):
+            for i, form in enumerate(vocab.cases):
+                self._add_form(form, vocab, Parsing.from_case(i))
+
+    def lookup(self, form: str) -> list[tuple[Vocab, Parsing]]:
+        """
+        Returns every `(vocab, parsing)` that `form` could be
+        """
+        return self.forms.get(self.normalize(form), [])